@@ -0,0 +1,153 @@
+"""baseline: schema previously created by Base.metadata.create_all
+
+Databases that were created by the old create_all() call already have these
+tables: mark them with `alembic stamp 0001` instead of running this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("telegram_id", sa.BigInteger(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("username", sa.String(), nullable=True),
+        sa.Column("language", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("stripe_account_id", sa.String(), nullable=True),
+        sa.Column("stripe_onboarded", sa.Boolean(), nullable=True),
+        sa.Column("balance_cents", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("payout_method", sa.String(), nullable=True),
+        sa.Column("payout_details", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_telegram_id", "users", ["telegram_id"], unique=True)
+
+    op.create_table(
+        "end_users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("telegram_id", sa.BigInteger(), nullable=False),
+        sa.Column("language", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_end_users_id", "end_users", ["id"])
+    op.create_index("ix_end_users_telegram_id", "end_users", ["telegram_id"], unique=True)
+
+    op.create_table(
+        "projects",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("telegram_channel_id", sa.BigInteger(), nullable=True),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("username", sa.String(), nullable=True),
+        sa.Column("active", sa.Boolean(), nullable=True),
+        sa.Column("settings", postgresql.JSONB(), nullable=True),
+    )
+    op.create_index("ix_projects_id", "projects", ["id"])
+    op.create_index("ix_projects_telegram_channel_id", "projects", ["telegram_channel_id"])
+
+    op.create_table(
+        "plans",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("currency", sa.String(10), nullable=False),
+        sa.Column("duration_days", sa.Integer(), nullable=False),
+        sa.Column("active", sa.Boolean(), nullable=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+    )
+    op.create_index("ix_plans_id", "plans", ["id"])
+
+    op.create_table(
+        "subscriptions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("end_user_id", sa.Integer(), sa.ForeignKey("end_users.id"), nullable=False),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("plan_id", sa.Integer(), sa.ForeignKey("plans.id"), nullable=False),
+        sa.Column("start_at", sa.DateTime(), nullable=True),
+        sa.Column("end_at", sa.DateTime(), nullable=False),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("auto_renew", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_subscriptions_id", "subscriptions", ["id"])
+
+    op.create_table(
+        "payments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("telegram_id", sa.BigInteger(), nullable=False),
+        sa.Column("plan_id", sa.Integer(), sa.ForeignKey("plans.id"), nullable=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=True),
+        sa.Column("stripe_session_id", sa.String(255), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("currency", sa.String(10), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+    )
+    op.create_index("ix_payments_id", "payments", ["id"])
+    op.create_index("ix_payments_telegram_id", "payments", ["telegram_id"])
+    op.create_index(
+        "ix_payments_stripe_session_id", "payments", ["stripe_session_id"], unique=True
+    )
+
+    op.create_table(
+        "connect_sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("token", sa.String(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("telegram_user_id", sa.BigInteger(), nullable=True),
+        sa.Column("is_completed", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_connect_sessions_id", "connect_sessions", ["id"])
+    op.create_index("ix_connect_sessions_token", "connect_sessions", ["token"], unique=True)
+    op.create_index(
+        "ix_connect_sessions_telegram_user_id", "connect_sessions", ["telegram_user_id"]
+    )
+
+    op.create_table(
+        "payout_requests",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("amount_cents", sa.BigInteger(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("payout_method", sa.String(), nullable=True),
+        sa.Column("payout_details", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("processed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_payout_requests_id", "payout_requests", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("payout_requests")
+    op.drop_table("connect_sessions")
+    op.drop_table("payments")
+    op.drop_table("subscriptions")
+    op.drop_table("plans")
+    op.drop_table("projects")
+    op.drop_table("end_users")
+    op.drop_table("users")
@@ -0,0 +1,85 @@
+"""stripe_events inbox, telegram_outbox, checkout columns on payments
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # if_not_exists: на части окружений эти таблицы уже создал create_all()
+    op.create_table(
+        "stripe_events",
+        sa.Column("id", sa.String(255), primary_key=True),
+        sa.Column("type", sa.String(255), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("received_at", sa.DateTime(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("processed_at", sa.DateTime(), nullable=True),
+        sa.Column("processing_ms", sa.Integer(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_stripe_events_status_next_attempt",
+        "stripe_events",
+        ["status", "next_attempt_at"],
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "telegram_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("method", sa.String(64), nullable=False),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index("ix_telegram_outbox_id", "telegram_outbox", ["id"], if_not_exists=True)
+    op.create_index(
+        "ix_telegram_outbox_status_next_attempt",
+        "telegram_outbox",
+        ["status", "next_attempt_at"],
+        if_not_exists=True,
+    )
+
+    # nullable-колонки без default: в Postgres это только изменение каталога
+    op.add_column(
+        "payments", sa.Column("checkout_url", sa.String(), nullable=True), if_not_exists=True
+    )
+    op.add_column(
+        "payments",
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=True),
+        if_not_exists=True,
+    )
+    op.add_column(
+        "payments",
+        sa.Column("idempotency_key", sa.String(255), nullable=True),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("payments", "idempotency_key")
+    op.drop_column("payments", "expires_at")
+    op.drop_column("payments", "checkout_url")
+    op.drop_table("telegram_outbox")
+    op.drop_table("stripe_events")
@@ -0,0 +1,65 @@
+"""hot-path composite indexes, built CONCURRENTLY
+
+CREATE INDEX CONCURRENTLY cannot run inside a transaction, so every index is
+created in an autocommit block: writes to the tables keep going while the
+index is being built.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, unique)
+INDEXES = [
+    (
+        "ix_subscriptions_user_project_status_end_at",
+        "subscriptions",
+        ["end_user_id", "project_id", "status", "end_at"],
+        False,
+    ),
+    ("ix_subscriptions_status_end_at", "subscriptions", ["status", "end_at"], False),
+    (
+        "ix_payments_project_status_created",
+        "payments",
+        ["project_id", "status", "created_at"],
+        False,
+    ),
+    (
+        "ix_payments_checkout_reuse",
+        "payments",
+        ["telegram_id", "plan_id", "status", "expires_at"],
+        False,
+    ),
+    ("ix_payments_idempotency_key", "payments", ["idempotency_key"], True),
+    ("ix_plans_project_active", "plans", ["project_id", "active"], False),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=unique,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
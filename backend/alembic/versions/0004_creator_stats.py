@@ -0,0 +1,108 @@
+"""creator_stats / project_stats: incrementally maintained dashboard counters
+
+The tables are backfilled from the existing data; afterwards
+`python -m app.services.creator_stats` recomputes them the same way.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+BACKFILL_PROJECT_STATS = """
+INSERT INTO project_stats (project_id, active_subscribers, paid_payments, revenue_minor, updated_at)
+SELECT p.id,
+       COALESCE(s.subscribers, 0),
+       COALESCE(r.payments, 0),
+       COALESCE(r.revenue, '{}'::jsonb),
+       now() AT TIME ZONE 'utc'
+FROM projects p
+LEFT JOIN (
+    SELECT project_id, count(DISTINCT end_user_id) AS subscribers
+    FROM subscriptions WHERE status = 'active' GROUP BY project_id
+) s ON s.project_id = p.id
+LEFT JOIN (
+    SELECT project_id, sum(payments)::int AS payments,
+           jsonb_object_agg(currency, minor::bigint) AS revenue
+    FROM (
+        SELECT project_id, upper(currency) AS currency, count(*) AS payments,
+               sum(round(amount * 100)) AS minor
+        FROM payments WHERE status = 'paid' AND project_id IS NOT NULL
+        GROUP BY project_id, upper(currency)
+    ) paid GROUP BY project_id
+) r ON r.project_id = p.id
+"""
+
+BACKFILL_CREATOR_STATS = """
+INSERT INTO creator_stats (user_id, projects, active_subscribers, paid_payments, revenue_minor, updated_at)
+SELECT c.user_id,
+       c.projects,
+       COALESCE(s.subscribers, 0),
+       COALESCE(r.payments, 0),
+       COALESCE(r.revenue, '{}'::jsonb),
+       now() AT TIME ZONE 'utc'
+FROM (SELECT user_id, count(*) AS projects FROM projects GROUP BY user_id) c
+LEFT JOIN (
+    SELECT p.user_id, count(DISTINCT s.end_user_id) AS subscribers
+    FROM subscriptions s JOIN projects p ON p.id = s.project_id
+    WHERE s.status = 'active' GROUP BY p.user_id
+) s ON s.user_id = c.user_id
+LEFT JOIN (
+    SELECT user_id, sum(payments)::int AS payments,
+           jsonb_object_agg(currency, minor::bigint) AS revenue
+    FROM (
+        SELECT p.user_id, upper(pay.currency) AS currency, count(*) AS payments,
+               sum(round(pay.amount * 100)) AS minor
+        FROM payments pay JOIN projects p ON p.id = pay.project_id
+        WHERE pay.status = 'paid'
+        GROUP BY p.user_id, upper(pay.currency)
+    ) paid GROUP BY user_id
+) r ON r.user_id = c.user_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "creator_stats",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("projects", sa.Integer(), nullable=False),
+        sa.Column("active_subscribers", sa.Integer(), nullable=False),
+        sa.Column("paid_payments", sa.Integer(), nullable=False),
+        sa.Column(
+            "revenue_minor",
+            postgresql.JSONB(),
+            server_default=sa.text("'{}'::jsonb"),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        "project_stats",
+        sa.Column(
+            "project_id", sa.Integer(), sa.ForeignKey("projects.id"), primary_key=True
+        ),
+        sa.Column("active_subscribers", sa.Integer(), nullable=False),
+        sa.Column("paid_payments", sa.Integer(), nullable=False),
+        sa.Column(
+            "revenue_minor",
+            postgresql.JSONB(),
+            server_default=sa.text("'{}'::jsonb"),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+    op.execute(BACKFILL_PROJECT_STATS)
+    op.execute(BACKFILL_CREATOR_STATS)
+
+
+def downgrade() -> None:
+    op.drop_table("project_stats")
+    op.drop_table("creator_stats")
@@ -0,0 +1,49 @@
+"""payments: (project_id, status, created_at, id) for keyset history pages
+
+Replaces ix_payments_project_status_created, which is a prefix of the new
+index. Both operations run CONCURRENTLY, see 0003.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_payments_project_status_created_id",
+            "payments",
+            ["project_id", "status", "created_at", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_payments_project_status_created",
+            table_name="payments",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_payments_project_status_created",
+            "payments",
+            ["project_id", "status", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_payments_project_status_created_id",
+            table_name="payments",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
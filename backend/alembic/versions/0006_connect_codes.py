@@ -0,0 +1,56 @@
+"""connect_sessions hold channel connection codes (was projects.settings JSONB)
+
+Pending codes from projects.settings["connection_code"] are copied over so
+that links already handed out keep working until they expire.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "connect_sessions",
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=True),
+    )
+    op.execute(
+        """
+        INSERT INTO connect_sessions
+            (token, user_id, project_id, is_completed, created_at, expires_at)
+        SELECT settings ->> 'connection_code', user_id, id, false,
+               now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc' + interval '1 hour'
+        FROM projects
+        WHERE settings ? 'connection_code'
+          AND coalesce(settings ->> 'status', '') <> 'connected'
+        ON CONFLICT (token) DO NOTHING
+        """
+    )
+    op.execute("UPDATE projects SET settings = settings - 'connection_code' WHERE settings ? 'connection_code'")
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_connect_sessions_project_id",
+            "connect_sessions",
+            ["project_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_connect_sessions_project_id",
+            table_name="connect_sessions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("connect_sessions", "project_id")
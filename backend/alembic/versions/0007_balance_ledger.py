@@ -0,0 +1,66 @@
+"""balance_ledger / balance_snapshots: append-only creator balance
+
+Existing users.balance_cents values become opening "adjustment" entries;
+the column itself is no longer written.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+OPENING_BALANCES = """
+INSERT INTO balance_ledger (user_id, entry_type, amount_cents, note, created_at)
+SELECT id, 'adjustment', balance_cents, 'opening balance', now() AT TIME ZONE 'utc'
+FROM users
+WHERE balance_cents <> 0
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "balance_ledger",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("entry_type", sa.String(length=20), nullable=False),
+        sa.Column("amount_cents", sa.BigInteger(), nullable=False),
+        sa.Column("payment_id", sa.Integer(), sa.ForeignKey("payments.id"), nullable=True),
+        sa.Column(
+            "payout_id", sa.Integer(), sa.ForeignKey("payout_requests.id"), nullable=True
+        ),
+        sa.Column("note", sa.Text(), nullable=True),
+        sa.Column(
+            "txid",
+            sa.BigInteger(),
+            server_default=sa.text("(pg_current_xact_id()::text)::bigint"),
+            nullable=False,
+        ),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_balance_ledger_user_txid", "balance_ledger", ["user_id", "txid"])
+    op.create_index("ix_balance_ledger_txid", "balance_ledger", ["txid"])
+    op.create_index(
+        "ix_balance_ledger_user_created_id",
+        "balance_ledger",
+        ["user_id", "created_at", "id"],
+    )
+    op.create_table(
+        "balance_snapshots",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("balance_cents", sa.BigInteger(), nullable=False),
+        sa.Column("horizon_txid", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+    op.execute(OPENING_BALANCES)
+
+
+def downgrade() -> None:
+    op.drop_table("balance_snapshots")
+    op.drop_table("balance_ledger")
@@ -0,0 +1,59 @@
+"""payout_requests: worker bookkeeping for the payout processor
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "payout_requests",
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column("payout_requests", sa.Column("last_error", sa.Text(), nullable=True))
+    op.add_column(
+        "payout_requests",
+        sa.Column(
+            "next_attempt_at",
+            sa.DateTime(),
+            server_default=sa.text("(now() AT TIME ZONE 'utc')"),
+            nullable=False,
+        ),
+    )
+    op.add_column("payout_requests", sa.Column("locked_until", sa.DateTime(), nullable=True))
+    op.add_column(
+        "payout_requests",
+        sa.Column("external_reference", sa.String(length=255), nullable=True),
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_payout_requests_status_next_attempt",
+            "payout_requests",
+            ["status", "next_attempt_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_payout_requests_status_next_attempt",
+            table_name="payout_requests",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("payout_requests", "external_reference")
+    op.drop_column("payout_requests", "locked_until")
+    op.drop_column("payout_requests", "next_attempt_at")
+    op.drop_column("payout_requests", "last_error")
+    op.drop_column("payout_requests", "attempts")
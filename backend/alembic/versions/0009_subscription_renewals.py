@@ -0,0 +1,45 @@
+"""subscriptions: renewal reminder bookkeeping
+
+Adds renewal_reminded_at and a partial index over end_at for the
+subscriptions still waiting for a reminder, built CONCURRENTLY (see 0003).
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "subscriptions", sa.Column("renewal_reminded_at", sa.DateTime(), nullable=True)
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_subscriptions_renewal_due",
+            "subscriptions",
+            ["end_at"],
+            postgresql_where=sa.text(
+                "status = 'active' AND auto_renew AND renewal_reminded_at IS NULL"
+            ),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_subscriptions_renewal_due",
+            table_name="subscriptions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("subscriptions", "renewal_reminded_at")
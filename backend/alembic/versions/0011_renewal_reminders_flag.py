@@ -0,0 +1,58 @@
+"""subscriptions.renewal_reminders: reminders no longer depend on auto_renew
+
+Adds the per-subscription opt-out flag (on for every existing row) and
+rebuilds ix_subscriptions_renewal_due on it, CONCURRENTLY (see 0003).
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def _create_due_index(flag: str) -> None:
+    op.create_index(
+        "ix_subscriptions_renewal_due",
+        "subscriptions",
+        ["end_at"],
+        postgresql_where=sa.text(
+            f"status = 'active' AND {flag} AND renewal_reminded_at IS NULL"
+        ),
+        postgresql_concurrently=True,
+        if_not_exists=True,
+    )
+
+
+def _drop_due_index() -> None:
+    op.drop_index(
+        "ix_subscriptions_renewal_due",
+        table_name="subscriptions",
+        postgresql_concurrently=True,
+        if_exists=True,
+    )
+
+
+def upgrade() -> None:
+    op.add_column(
+        "subscriptions",
+        sa.Column(
+            "renewal_reminders", sa.Boolean(), nullable=False, server_default=sa.true()
+        ),
+    )
+
+    with op.get_context().autocommit_block():
+        _drop_due_index()
+        _create_due_index("renewal_reminders")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        _drop_due_index()
+        _create_due_index("auto_renew")
+    op.drop_column("subscriptions", "renewal_reminders")
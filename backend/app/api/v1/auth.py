@@ -7,8 +7,8 @@ from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.deps import get_db
-from app.core.security import create_access_token
+from app.core.deps import get_bearer_token, get_db, get_principal
+from app.core.security import Principal, create_access_token, revoke_token, revoke_user_tokens
 from app.models.user import User
 
 router = APIRouter()  # <-- ВАЖНО: объявляем router до использования
@@ -62,9 +62,25 @@ async def auth_telegram(request: Request, db: Session = Depends(get_db)):
         db.refresh(user)
 
     # создаём JWT
-    token = create_access_token({"sub": str(user.id)})
+    token = create_access_token({"sub": str(user.id)}, token_version=user.token_version)
 
     # редиректим обратно на фронт
     FRONTEND_URL = "https://fanstero.netlify.app/app"
 
     return RedirectResponse(url=f"{FRONTEND_URL}?token={token}")
+
+
+@router.post("/logout")
+def logout(
+    everywhere: bool = False,
+    token: str = Depends(get_bearer_token),
+    principal: Principal = Depends(get_principal),
+    db: Session = Depends(get_db),
+):
+    """Отзывает текущий токен (или все токены пользователя при everywhere=true)."""
+    if everywhere:
+        revoke_user_tokens(db, principal.user_id)
+    else:
+        revoke_token(db, token)
+    db.commit()
+    return {"ok": True}
@@ -1,13 +1,12 @@
-from datetime import datetime
-
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db
-from app.models.connect_session import ConnectSession
 from app.models.project import Project
 from app.models.user import User
+from app.services import creator_stats
+from app.services.connect_codes import consume_connect_session
 
 router = APIRouter()
 
@@ -27,37 +26,51 @@ def channel_connected(payload: ChannelConnectedPayload, db: Session = Depends(ge
     to a channel for a specific connect_token.
     """
 
-    session = (
-        db.query(ConnectSession)
-        .filter(ConnectSession.token == payload.connect_token)
-        .first()
+    # single use: marks the session completed and saves telegram_user_id
+    session = consume_connect_session(
+        db, payload.connect_token, telegram_user_id=payload.telegram_user_id
     )
 
     if not session:
-        raise HTTPException(status_code=404, detail="Connect session not found")
-
-    if session.expires_at and session.expires_at < datetime.utcnow():
-        raise HTTPException(status_code=400, detail="Connect session has expired")
+        raise HTTPException(
+            status_code=404, detail="Connect session not found, expired or already used"
+        )
 
     user = db.query(User).filter(User.id == session.user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # mark session as completed and save telegram_user_id
-    session.telegram_user_id = payload.telegram_user_id
-    session.is_completed = True
+    project = None
+    if session.project_id:
+        # the code was issued for an existing project (POST /projects/):
+        # attach the channel to it instead of creating a duplicate
+        project = (
+            db.query(Project)
+            .filter(Project.id == session.project_id, Project.user_id == user.id)
+            .first()
+        )
 
-    # create project linked to this channel
-    project = Project(
-        user_id=user.id,
-        telegram_channel_id=payload.channel_id,
-        title=payload.channel_title or "Untitled channel",
-        username=payload.channel_username,
-        active=True,
-        settings={},
-    )
+    if project:
+        project.telegram_channel_id = payload.channel_id
+        if payload.channel_title:
+            project.title = payload.channel_title
+        if payload.channel_username:
+            project.username = payload.channel_username
+        # new dict: in-place changes of a JSONB value are not detected by SQLAlchemy
+        project.settings = {**(project.settings or {}), "status": "connected"}
+    else:
+        # create project linked to this channel
+        project = Project(
+            user_id=user.id,
+            telegram_channel_id=payload.channel_id,
+            title=payload.channel_title or "Untitled channel",
+            username=payload.channel_username,
+            active=True,
+            settings={},
+        )
+        db.add(project)
+        creator_stats.project_created(db, user.id)
 
-    db.add(project)
     db.commit()
     db.refresh(project)
 
@@ -0,0 +1,52 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app.core.deps import get_principal
+from app.core.security import Principal
+from app.db.session import AsyncSessionLocal
+from app.models.project import Project
+from app.services.exports import export_rows
+
+router = APIRouter()
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+# ==== Streaming export of a project's data ====
+
+@router.get("/{project_id}/export/{table}")
+async def export_project_data(
+    project_id: int,
+    table: Literal["subscriptions", "end_users", "payments"],
+    fmt: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    gzip: bool = False,
+    principal: Principal = Depends(get_principal),
+):
+    """
+    Download subscriptions / end_users / payments of one project as CSV or
+    NDJSON (optionally gzipped). Rows are streamed from a server-side cursor,
+    so the export starts immediately and runs in constant memory.
+    """
+    # short-lived session: the stream below opens its own connection
+    async with AsyncSessionLocal() as db:
+        owner_id = await db.scalar(select(Project.user_id).where(Project.id == project_id))
+
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if owner_id != principal.user_id:
+        raise HTTPException(status_code=403, detail="Not your project")
+
+    filename = f"project-{project_id}-{table}.{fmt}"
+    media_type = MEDIA_TYPES[fmt]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        export_rows(table, project_id, fmt, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
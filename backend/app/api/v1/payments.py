@@ -1,105 +1,150 @@
-﻿from fastapi import APIRouter, HTTPException, Depends, Request, Header
+﻿import hmac
+import json
+
+from fastapi import APIRouter, HTTPException, Depends, Request, Header
+from fastapi.responses import RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from decimal import Decimal
+
+from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel
 
-from app.core.stripe_config import create_checkout_session
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.stripe_config import StripeUnavailableError
 from app.core.config import settings
-from app.db.session import get_db
-from app.models.payment import Payment
+from app.core.deps import (
+    get_admin_principal,
+    get_async_db,
+    get_current_user,
+    get_db,
+    get_principal,
+)
+from app.core.security import Principal
 from app.models.end_user import EndUser
-from app.models.subscription import Subscription
-from app.models.plan import SubscriptionPlan
+from app.models.payment import Payment
 from app.models.user import User
 from app.models.project import Project
 from app.models.payout import PayoutRequest  # 👈 новая модель
-from sqlalchemy import func
+from app.models.ledger import LedgerEntry
+from app.models.stats import CreatorStats
+from app.models.stripe_event import StripeEvent
+from app.models.subscription import Subscription
+from app.services import ledger, payouts, renewals
+from app.services.checkout import checkout_for_plan
+from app.services.stripe_inbox import store_event
+from sqlalchemy import func, select, true, tuple_
 
 import stripe
-from jose import jwt, JWTError
-import aiohttp  # 👈 для отправки сообщений в Telegram
 
 router = APIRouter()
 
-ALGORITHM = "HS256"
 
+# ---------------------------
+# CHECKOUT ПО ТАРИФУ (цена считается на сервере)
+# ---------------------------
+async def _checkout(
+    db: AsyncSession, telegram_id: int, plan_id: int, idempotency_key: str | None
+) -> dict:
+    if telegram_id == 0:
+        raise HTTPException(status_code=400, detail="telegram_id is required")
 
-# =========================================================
-# Helper: get current User from JWT token (Authorization)
-# =========================================================
-def get_current_user_from_token(authorization: str | None, db: Session) -> User:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=401, detail="Missing or invalid Authorization header"
+    try:
+        payment, reused = await checkout_for_plan(
+            db,
+            telegram_id=telegram_id,
+            plan_id=plan_id,
+            idempotency_key=idempotency_key,
         )
 
-    token = authorization.split(" ", 1)[1]
+        return {
+            "checkout_url": payment.checkout_url,
+            "payment_id": payment.id,
+            "reused": reused,
+        }
+    except HTTPException:
+        raise
+    except StripeUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        sub = payload.get("sub")
-        if sub is None:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
-        user_id = int(sub)
-    except (JWTError, ValueError):
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
-    return user
+@router.post("/checkout")
+async def create_checkout(
+    plan_id: int,
+    telegram_id: int = 0,
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Один вызов от бота: тариф берётся из кэша каталога, сумма и валюта —
+    из тарифа, Checkout Session создаётся (или переиспользуется) здесь же.
+    """
+    return await _checkout(db, telegram_id, plan_id, idempotency_key)
 
 
 # ---------------------------
-# СОЗДАНИЕ STRIPE SESSION
+# СОЗДАНИЕ STRIPE SESSION (старый вызов)
 # ---------------------------
-@router.post("/stripe/session")
+@router.post("/stripe/session", deprecated=True)
 async def create_stripe_session(
     plan_id: int,
     project_id: int,
-    amount: float,
-    currency: str = "EUR",
+    amount: float | None = None,
+    currency: str | None = None,
     telegram_id: int = 0,
-    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    if telegram_id == 0:
-        raise HTTPException(status_code=400, detail="telegram_id is required")
+    """
+    Оставлен для старых клиентов. amount/currency больше не используются:
+    цена всегда берётся из тарифа, как в POST /payments/checkout.
+    """
+    return await _checkout(db, telegram_id, plan_id, idempotency_key)
 
-    try:
-        session = create_checkout_session(
-            amount=amount,
-            currency=currency,
-            plan_id=plan_id,
-            project_id=project_id,
-            telegram_id=telegram_id,
-        )
 
-        payment = Payment(
-            telegram_id=telegram_id,
-            plan_id=plan_id,
-            project_id=project_id,
-            stripe_session_id=session.id,
-            amount=amount,
-            currency=currency,
-            status="pending",
+# ---------------------------
+# ПРОДЛЕНИЕ ПО ССЫЛКЕ ИЗ НАПОМИНАНИЯ
+# ---------------------------
+@router.get("/renew/{subscription_id}")
+async def renew_subscription(
+    subscription_id: int,
+    sig: str,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Ссылка из напоминания о продлении (app.services.renewals): Checkout
+    по тарифу подписки и редирект в Stripe. После оплаты webhook продлевает
+    эту же подписку, а не создаёт новую.
+    """
+    if not hmac.compare_digest(sig, renewals.renewal_signature(subscription_id)):
+        raise HTTPException(status_code=403, detail="Invalid renewal link")
+
+    row = (
+        await db.execute(
+            select(Subscription.plan_id, EndUser.telegram_id)
+            .join(EndUser, Subscription.end_user_id == EndUser.id)
+            .where(Subscription.id == subscription_id)
         )
-        db.add(payment)
-        db.commit()
-        db.refresh(payment)
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Subscription not found")
 
-        return {"checkout_url": session.url, "payment_id": payment.id}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    data = await _checkout(db, row.telegram_id, row.plan_id, None)
+    return RedirectResponse(data["checkout_url"], status_code=303)
 
 
 # ---------------------------
 # STRIPE WEBHOOK
 # ---------------------------
 @router.post("/stripe/webhook")
-async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
+async def stripe_webhook(request: Request):
+    """
+    Проверяем подпись, кладём событие в inbox и сразу отвечаем Stripe.
+    Вся обработка — в фоновых воркерах (app.services.stripe_inbox).
+    """
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
 
@@ -109,194 +154,98 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
         )
 
     try:
-        event = stripe.Webhook.construct_event(
+        stripe.Webhook.construct_event(
             payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid payload: {e}")
 
-    # ============================================================
-    # ОБРАБОТКА СОБЫТИЯ УСПЕШНОЙ ОПЛАТЫ
-    # ============================================================
-    if event["type"] == "checkout.session.completed":
-        session_obj = event["data"]["object"]
-        session_id = session_obj["id"]
-
-        # --- 1. ИЩЕМ ПЛАТЁЖ ---
-        payment: Payment | None = (
-            db.query(Payment)
-            .filter(Payment.stripe_session_id == session_id)
-            .first()
-        )
+    # сохраняем "сырое" событие, как его прислал Stripe
+    event = json.loads(payload)
+    created = await store_event(event)
+    if not created:
+        print(f"[WEBHOOK] ⚠ Event {event['id']} already received, skipping.")
 
-        # Платёж должны были создать ДО оплаты — если нет, создаём аварийно
-        if payment is None:
-            metadata = session_obj.get("metadata", {})
-            payment = Payment(
-                telegram_id=int(metadata.get("telegram_id", 0)),
-                plan_id=int(metadata.get("plan_id", 0)) or None,
-                project_id=int(metadata.get("project_id", 0)) or None,
-                stripe_session_id=session_id,
-                amount=session_obj["amount_total"] / 100.0,
-                currency=session_obj["currency"].upper(),
-                status="paid",
-            )
-            db.add(payment)
-            db.commit()
-            db.refresh(payment)
-        else:
-            # если уже "paid" — значит вебхук повторился, ничего не делаем
-            if payment.status == "paid":
-                print(f"[WEBHOOK] ⚠ Payment {payment.id} already processed, skipping.")
-                return {"received": True}
-
-            payment.status = "paid"
-            db.commit()
-            db.refresh(payment)
-
-        # --- 2. СОЗДАЁМ EndUser, если нет ---
-        end_user = (
-            db.query(EndUser)
-            .filter(EndUser.telegram_id == payment.telegram_id)
-            .first()
-        )
-
-        if not end_user:
-            end_user = EndUser(
-                telegram_id=payment.telegram_id,
-                language="en",
-            )
-            db.add(end_user)
-            db.flush()  # чтобы получить end_user.id
-
-        # --- 3. ПОЛУЧАЕМ ПЛАН ---
-        plan = (
-            db.query(SubscriptionPlan)
-            .filter(SubscriptionPlan.id == payment.plan_id)
-            .first()
-        )
-
-        if not plan:
-            print(f"[WEBHOOK] ❌ Plan not found for payment {payment.id}")
-            return {"received": True}
-
-        now = datetime.utcnow()
-
-        # Проверяем, нет ли уже активной подписки этого юзера на этот проект/план
-        existing_sub = (
-            db.query(Subscription)
-            .filter(
-                Subscription.end_user_id == end_user.id,
-                Subscription.project_id == plan.project_id,
-                Subscription.plan_id == plan.id,
-                Subscription.status == "active",
-                Subscription.end_at >= now,
-            )
-            .first()
-        )
-
-        if existing_sub:
-            print(
-                f"[WEBHOOK] ⚠ Subscription already active "
-                f"(id={existing_sub.id}) for user {end_user.id}, skipping duplicate."
-            )
-            return {"received": True}
-
-        # --- 4. СОЗДАЁМ ПОДПИСКУ ---
-        duration = plan.duration_days or 30
-        end_at = now + timedelta(days=duration)
-
-        subscription = Subscription(
-            end_user_id=end_user.id,
-            project_id=plan.project_id,
-            plan_id=plan.id,
-            start_at=now,
-            end_at=end_at,
-            status="active",
-            auto_renew=False,
-        )
-        db.add(subscription)
-
-        # --- 5. НАЧИСЛЯЕМ ДЕНЬГИ АВТОРУ ПРОЕКТА ---
-        project = (
-            db.query(Project)
-            .filter(Project.id == plan.project_id)
-            .first()
-        )
+    return {"received": True}
 
-        if not project:
-            print(f"[WEBHOOK] ❌ Project not found for plan {plan.id}")
-            db.commit()
-            return {"received": True}
 
-        creator = (
-            db.query(User)
-            .filter(User.id == project.user_id)
-            .first()
-        )
+# ---------------------------
+# STRIPE INBOX: мониторинг обработки событий
+# ---------------------------
+@router.get("/stripe/inbox")
+async def list_stripe_inbox(
+    status: str | None = None,
+    limit: int = 50,
+    _admin: Principal = Depends(get_admin_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Последние события из inbox: статус, число попыток, задержка обработки.
+    Только для админов: last_error может содержать данные из события.
+    """
+    query = select(StripeEvent).order_by(StripeEvent.received_at.desc())
+    if status:
+        query = query.where(StripeEvent.status == status)
+    events = (await db.scalars(query.limit(min(limit, 500)))).all()
 
-        if not creator:
-            print(f"[WEBHOOK] ❌ Creator not found for project {project.id}")
-            db.commit()
-            return {"received": True}
+    result = []
+    for e in events:
+        latency_ms = None
+        if e.processed_at:
+            latency_ms = int((e.processed_at - e.received_at).total_seconds() * 1000)
 
-        # Комиссия платформы 10% → 90% креатору
-        platform_fee_pct = Decimal("0.10")   # 👈 10% нам
-        gross_amount = Decimal(str(payment.amount))  # например 9.99
-        creator_amount = gross_amount * (Decimal("1.0") - platform_fee_pct)
+        result.append({
+            "id": e.id,
+            "type": e.type,
+            "status": e.status,
+            "attempts": e.attempts,
+            "received_at": e.received_at.isoformat(),
+            "processed_at": e.processed_at.isoformat() if e.processed_at else None,
+            "latency_ms": latency_ms,
+            "processing_ms": e.processing_ms,
+            "last_error": e.last_error,
+        })
 
-        # в центы
-        creator_cents = int(creator_amount * 100)
+    return result
 
-        creator.balance_cents = (creator.balance_cents or 0) + creator_cents
 
-        db.commit()
+@router.get("/stripe/inbox/stats")
+async def stripe_inbox_stats(
+    _admin: Principal = Depends(get_admin_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Сводка по inbox: сколько событий в каждом статусе, ретраи и задержки.
+    """
+    latency = func.extract("epoch", StripeEvent.processed_at - StripeEvent.received_at)
 
-        print(
-            f"[WEBHOOK] ✅ Subscription {subscription.id} created for user {payment.telegram_id}; "
-            f"credited {creator_amount} to creator {creator.id}. "
-            f"New balance: {creator.balance_cents / 100:.2f}."
+    rows = (
+        await db.execute(
+            select(
+                StripeEvent.status,
+                func.count(),
+                func.coalesce(func.sum(StripeEvent.attempts - 1), 0),
+                func.avg(latency),
+                func.max(latency),
+                func.avg(StripeEvent.processing_ms),
+            ).group_by(StripeEvent.status)
         )
+    ).all()
 
-        # --- 6. ОТПРАВЛЯЕМ СООБЩЕНИЕ В TELEGRAM С ПОДТВЕРЖДЕНИЕМ ---
-        try:
-            if payment.telegram_id:
-                # пытаемся собрать ссылку на канал по username проекта
-                channel_url = None
-                if project and project.username:
-                    username_clean = project.username.lstrip("@")
-                    channel_url = f"https://t.me/{username_clean}"
-
-                text_lines = [
-                    "✅ Payment received! Your subscription is now active."
-                ]
-
-                if channel_url:
-                    text_lines.append(
-                        f"Here is your channel link:\n{channel_url}"
-                    )
-                else:
-                    text_lines.append(
-                        "You now have access to the channel. "
-                        "If you don't see the invite, please contact the creator."
-                    )
-
-                text = "\n\n".join(text_lines)
-
-                async with aiohttp.ClientSession() as session_http:
-                    await session_http.post(
-                        f"https://api.telegram.org/bot{settings.BOT_TOKEN}/sendMessage",
-                        json={
-                            "chat_id": payment.telegram_id,
-                            "text": text,
-                        },
-                        timeout=10,
-                    )
-
-        except Exception as e:
-            print(f"[WEBHOOK] ⚠ Failed to send Telegram notification: {e}")
+    def _ms(value, scale=1):
+        return round(float(value) * scale, 1) if value is not None else None
 
-    return {"received": True}
+    result = {}
+    for status, count, retries, avg_latency, max_latency, avg_processing in rows:
+        result[status] = {
+            "count": count,
+            "retries": max(int(retries), 0),
+            "avg_latency_ms": _ms(avg_latency, 1000),
+            "max_latency_ms": _ms(max_latency, 1000),
+            "avg_processing_ms": _ms(avg_processing),
+        }
+
+    return result
 
 
 @router.get("/stripe/success")
@@ -343,16 +292,16 @@ class PayoutSettingsUpdate(BaseModel):
 
 @router.get("/me/summary")
 def get_my_payment_summary(
-    authorization: str = Header(None),
+    user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     Возвращает баланс и настройки выплат для текущего юзера (креатора).
+    Баланс — снимок + свежие записи ledger (app.services.ledger).
     """
-    user = get_current_user_from_token(authorization, db)
 
     return {
-        "balance": (user.balance_cents or 0) / 100,
+        "balance": ledger.get_balance_cents(db, user.id) / 100,
         "payout_method": user.payout_method,
         "payout_details": user.payout_details,
     }
@@ -361,13 +310,12 @@ def get_my_payment_summary(
 @router.post("/me/payout-settings")
 def update_my_payout_settings(
     payload: PayoutSettingsUpdate,
-    authorization: str = Header(None),
+    user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     Обновляет способ и реквизиты выплат креатора.
     """
-    user = get_current_user_from_token(authorization, db)
 
     user.payout_method = payload.payout_method.strip()
     user.payout_details = payload.payout_details.strip()
@@ -377,6 +325,57 @@ def update_my_payout_settings(
     return {"ok": True}
 
 
+@router.get("/me/ledger")
+async def get_my_ledger(
+    entry_type: Literal[ledger.ENTRY_TYPES] | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
+    principal: Principal = Depends(get_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    История изменений баланса (от новых к старым): начисления за платежи,
+    комиссия платформы, выплаты, корректировки. Курсор — как в /creator/payments.
+    """
+    limit = max(1, min(limit, 200))
+
+    query = (
+        select(LedgerEntry)
+        .where(LedgerEntry.user_id == principal.user_id)
+        .order_by(LedgerEntry.created_at.desc(), LedgerEntry.id.desc())
+        .limit(limit + 1)
+    )
+    if entry_type:
+        query = query.where(LedgerEntry.entry_type == entry_type)
+    if cursor:
+        query = query.where(
+            tuple_(LedgerEntry.created_at, LedgerEntry.id) < tuple_(*decode_cursor(cursor))
+        )
+
+    entries = (await db.scalars(query)).all()
+
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = encode_cursor(entries[-1].created_at, entries[-1].id)
+
+    return {
+        "items": [
+            {
+                "id": e.id,
+                "type": e.entry_type,
+                "amount": e.amount_cents / 100,
+                "payment_id": e.payment_id,
+                "payout_id": e.payout_id,
+                "note": e.note,
+                "created_at": e.created_at.isoformat(),
+            }
+            for e in entries
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
 class PayoutRequestCreate(BaseModel):
    
     amount: float | None = None
@@ -385,16 +384,17 @@ class PayoutRequestCreate(BaseModel):
 @router.post("/me/payout-request")
 def create_payout_request(
     payload: PayoutRequestCreate,
-    authorization: str = Header(None),
+    user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     Создает заявку на вывод средств.
     Сейчас выводится весь доступный баланс.
     """
-    user = get_current_user_from_token(authorization, db)
 
-    current_cents = user.balance_cents or 0
+    # две параллельные заявки не должны вывести один и тот же баланс
+    ledger.lock_balance(db, user.id)
+    current_cents = ledger.get_balance_cents(db, user.id)
     if current_cents <= 0:
         raise HTTPException(status_code=400, detail="No funds available for payout")
 
@@ -422,10 +422,11 @@ def create_payout_request(
         payout_details=user.payout_details,
     )
 
-    # для MVP просто списываем баланс (можно сделать hold-статус)
-    user.balance_cents = 0
-
     db.add(payout)
+    db.flush()
+
+    # для MVP просто списываем весь баланс (можно сделать hold-статус)
+    ledger.debit_payout(db, user.id, payout.id, amount_cents)
     db.commit()
     db.refresh(payout)
 
@@ -435,69 +436,77 @@ def create_payout_request(
         "amount": amount_cents / 100,
         "status": payout.status,
     }
+# ---------------------------
+# ОБРАБОТКА ВЫПЛАТ: мониторинг
+# ---------------------------
+@router.get("/payouts/metrics")
+async def get_payout_metrics(_admin: Principal = Depends(get_admin_principal)):
+    """
+    Очередь выплат по статусам и итоги за последний час — из БД, по всем
+    процессам. Плюс счётчики воркеров только того процесса, что ответил:
+    при нескольких процессах это лишь часть картины.
+    """
+    return {
+        "queue": await payouts.queue_stats(),
+        "last_hour": await payouts.recent_stats(60),
+        "this_process": payouts.get_metrics(),
+    }
+
+
 @router.get("/creator/overview")
-def get_creator_overview(
-    authorization: str = Header(None),
-    db: Session = Depends(get_db),
+async def get_creator_overview(
+    principal: Principal = Depends(get_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Краткая сводка для дашборда креатора:
     - текущий баланс
     - количество подключенных каналов
     - количество активных подписчиков
-    - общая выручка по всем успешным платежам
-    """
-    user = get_current_user_from_token(authorization, db)
-    now = datetime.utcnow()
-
-    # сколько каналов у юзера
-    connected_channels = (
-        db.query(func.count(Project.id))
-        .filter(Project.user_id == user.id)
-        .scalar()
-        or 0
-    )
+    - выручка по всем успешным платежам (по валютам и общая сумма)
 
-    # количество уникальных end_user с активной подпиской на его проекты
-    active_subscribers = (
-        db.query(func.count(func.distinct(Subscription.end_user_id)))
-        .join(Project, Subscription.project_id == Project.id)
-        .filter(
-            Project.user_id == user.id,
-            Subscription.status == "active",
-            Subscription.end_at >= now,
+    Одна строка: счётчики ведёт app.services.creator_stats.
+    """
+    row = (
+        await db.execute(
+            select(
+                ledger.balance_cents_expr(User.id).label("balance_cents"),
+                CreatorStats.projects,
+                CreatorStats.active_subscribers,
+                CreatorStats.revenue_minor,
+            )
+            .select_from(User)
+            .outerjoin(CreatorStats, CreatorStats.user_id == User.id)
+            .where(User.id == principal.user_id)
         )
-        .scalar()
-        or 0
-    )
+    ).first()
 
-    # общая выручка по всем paid-платежам на его проекты
-    total_revenue = (
-        db.query(func.coalesce(func.sum(Payment.amount), 0.0))
-        .join(Project, Payment.project_id == Project.id)
-        .filter(
-            Project.user_id == user.id,
-            Payment.status == "paid",
-        )
-        .scalar()
-        or 0.0
-    )
+    if row is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    revenue_minor = row.revenue_minor or {}
 
     return {
-        "balance": (user.balance_cents or 0) / 100,
-        "connected_channels": int(connected_channels),
-        "active_subscribers": int(active_subscribers),
-        "total_revenue": float(total_revenue),
+        "balance": (row.balance_cents or 0) / 100,
+        "connected_channels": row.projects or 0,
+        "active_subscribers": row.active_subscribers or 0,
+        # как и раньше — простая сумма всех валют, для совместимости с фронтом
+        "total_revenue": sum(revenue_minor.values()) / 100,
+        "revenue_by_currency": {
+            currency: amount / 100 for currency, amount in sorted(revenue_minor.items())
+        },
     }
+
+
 @router.get("/creator/recent-payments")
 def get_creator_recent_payments(
-    authorization: str = Header(None),
+    principal: Principal = Depends(get_principal),
     db: Session = Depends(get_db),
 ):
     """
     Последние оплаченные платежи для дашборда креатора.
+    Нужен только user_id из токена -> без запроса в users.
     """
-    user = get_current_user_from_token(authorization, db)
 
     rows = (
         db.query(
@@ -509,7 +518,7 @@ def get_creator_recent_payments(
         )
         .join(Project, Payment.project_id == Project.id)
         .filter(
-            Project.user_id == user.id,
+            Project.user_id == principal.user_id,
             Payment.status == "paid",
         )
         .order_by(Payment.created_at.desc())
@@ -527,4 +536,94 @@ def get_creator_recent_payments(
             "project_title": r.project_title,
         })
 
-    return result
\ No newline at end of file
+    return result
+
+
+# =========================================================
+# ИСТОРИЯ ПЛАТЕЖЕЙ КРЕАТОРА (keyset-пагинация)
+# =========================================================
+@router.get("/creator/payments")
+async def get_creator_payment_history(
+    project_id: int | None = None,
+    status: Literal["paid", "pending", "failed", "canceled"] = "paid",
+    currency: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
+    principal: Principal = Depends(get_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Платежи по проектам креатора, от новых к старым.
+
+    Пагинация по курсору (created_at, id) вместо OFFSET: для каждого проекта
+    это range scan по ix_payments_project_status_created_id, поэтому
+    тысячная страница стоит столько же, сколько первая.
+    В ответе next_cursor -> передать как ?cursor=... для следующей страницы.
+    """
+    limit = max(1, min(limit, 200))
+
+    projects = select(Project.id, Project.title).where(Project.user_id == principal.user_id)
+    if project_id is not None:
+        projects = projects.where(Project.id == project_id)
+    projects = projects.subquery()
+
+    # по каждому проекту берём не больше limit+1 строк по индексу, потом сливаем
+    per_project = (
+        select(
+            Payment.id,
+            Payment.project_id,
+            Payment.telegram_id,
+            Payment.plan_id,
+            Payment.amount,
+            Payment.currency,
+            Payment.status,
+            Payment.created_at,
+        )
+        .where(Payment.project_id == projects.c.id, Payment.status == status)
+        .order_by(Payment.created_at.desc(), Payment.id.desc())
+        .limit(limit + 1)
+    )
+    if currency:
+        per_project = per_project.where(func.upper(Payment.currency) == currency.upper())
+    if created_from:
+        per_project = per_project.where(Payment.created_at >= created_from)
+    if created_to:
+        per_project = per_project.where(Payment.created_at < created_to)
+    if cursor:
+        per_project = per_project.where(
+            tuple_(Payment.created_at, Payment.id) < tuple_(*decode_cursor(cursor))
+        )
+    page = per_project.lateral("page")
+
+    rows = (
+        await db.execute(
+            select(page, projects.c.title.label("project_title"))
+            .select_from(projects)
+            .join(page, true())
+            .order_by(page.c.created_at.desc(), page.c.id.desc())
+            .limit(limit + 1)
+        )
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    items = []
+    for r in rows:
+        items.append({
+            "id": r.id,
+            "project_id": r.project_id,
+            "project_title": r.project_title,
+            "telegram_id": r.telegram_id,
+            "plan_id": r.plan_id,
+            "amount": float(r.amount),
+            "currency": r.currency,
+            "status": r.status,
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+        })
+
+    return {"items": items, "next_cursor": next_cursor}
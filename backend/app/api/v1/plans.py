@@ -1,30 +1,31 @@
 ﻿from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_db
+from app.core.config import settings
+from app.core.deps import get_async_db, get_db, get_principal
+from app.core.http_cache import conditional_response
+from app.core.security import Principal
 from app.models.plan import SubscriptionPlan
 from app.models.project import Project
-from app.schemas.plan import PlanCreate, PlanRead
+from app.schemas.plan import PlanCreate, PlanRead, PlanUpdate
+from app.services import plan_catalog
 
 router = APIRouter()
 
 
 @router.get("/project/{project_id}", response_model=List[PlanRead])
-def list_plans_for_project(project_id: int, db: Session = Depends(get_db)):
+async def list_plans_for_project(
+    project_id: int, request: Request, db: AsyncSession = Depends(get_async_db)
+):
     """
     Список активных тарифов для конкретного проекта (канала).
+    Отдаётся из кэша с ETag; If-None-Match -> 304 без тела.
     """
-    plans = (
-        db.query(SubscriptionPlan)
-        .filter(
-            SubscriptionPlan.project_id == project_id,
-            SubscriptionPlan.active == True,  # noqa: E712
-        )
-        .all()
-    )
-    return plans
+    catalog = await plan_catalog.get_project_plans(db, project_id)
+    return conditional_response(request, catalog, settings.PLAN_CACHE_MAX_AGE)
 
 
 @router.post("/", response_model=PlanRead)
@@ -47,11 +48,46 @@ def create_plan(payload: PlanCreate, db: Session = Depends(get_db)):
     db.add(plan)
     db.commit()
     db.refresh(plan)
+    plan_catalog.invalidate(plan.project_id, plan.id)
     return plan
 
-@router.get("/{plan_id}", response_model=PlanRead)
-def get_plan(plan_id: int, db: Session = Depends(get_db)):
-    plan = db.query(SubscriptionPlan).filter(SubscriptionPlan.id == plan_id).first()
+
+@router.patch("/{plan_id}", response_model=PlanRead)
+def update_plan(
+    plan_id: int,
+    payload: PlanUpdate,
+    principal: Principal = Depends(get_principal),
+    db: Session = Depends(get_db),
+):
+    """
+    Изменить тариф (цена, название, срок, вкл/выкл).
+    Только владелец проекта; чужой тариф — 404, как и несуществующий.
+    """
+    plan = (
+        db.query(SubscriptionPlan)
+        .join(Project, SubscriptionPlan.project_id == Project.id)
+        .filter(
+            SubscriptionPlan.id == plan_id,
+            Project.user_id == principal.user_id,
+        )
+        .first()
+    )
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
-    return plan
\ No newline at end of file
+
+    for field, value in payload.model_dump(exclude_unset=True).items():
+        setattr(plan, field, value)
+    db.commit()
+    db.refresh(plan)
+    plan_catalog.invalidate(plan.project_id, plan.id)
+    return plan
+
+
+@router.get("/{plan_id}", response_model=PlanRead)
+async def get_plan(
+    plan_id: int, request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    plan = await plan_catalog.get_plan(db, plan_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    return conditional_response(request, plan, settings.PLAN_CACHE_MAX_AGE)
@@ -1,22 +1,21 @@
 ﻿from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-import requests
-import secrets
 from pydantic import BaseModel
-from jose import jwt, JWTError
 
-from app.core.deps import get_db
+from app.core.deps import get_async_db, get_db, get_principal
 from app.core.config import settings
+from app.core.security import Principal
 from app.models.project import Project
-from app.models.user import User
 from app.schemas.project import ProjectCreate, ProjectRead
+from app.services import channel_health, creator_stats
+from app.services.connect_codes import consume_connect_session, issue_connect_session
 
 router = APIRouter()
 
-ALGORITHM = "HS256"  # тот же, что использует твой бекенд при создании JWT
-
 
 # ==== Дополнительная схема для привязки канала через бота ====
 
@@ -30,67 +29,64 @@ class ConnectChannelPayload(BaseModel):
 
 @router.get("/", response_model=List[ProjectRead])
 def list_projects(
-    authorization: str = Header(None),
+    principal: Principal = Depends(get_principal),
     db: Session = Depends(get_db)
 ):
     """Return only projects that belong to logged-in user."""
-    
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
-
-    token = authorization.split(" ", 1)[1]
-
-    try:
-        payload_jwt = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        sub = payload_jwt.get("sub")
-        if sub is None:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
-        user_id = int(sub)
-    except (JWTError, ValueError):
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    projects = db.query(Project).filter(Project.user_id == user_id).all()
+    projects = db.query(Project).filter(Project.user_id == principal.user_id).all()
     return projects
 
 
 
 # ==== Проверка, что бот админ (можем оставить для "Check connection" по желанию) ====
 
-@router.get("/{project_id}/check_bot")
-def check_bot_status(project_id: int, db: Session = Depends(get_db)):
-    """
-    Check if the bot is an administrator in the project's Telegram channel.
-    """
+def _require_bot_token() -> None:
     bot_token = settings.BOT_TOKEN
     if not bot_token or bot_token == "CHANGE_ME":
         raise HTTPException(status_code=500, detail="BOT_TOKEN not configured")
 
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
 
-    if not project.telegram_channel_id:
-        return {"ok": False, "error": "Channel not configured"}
+@router.get("/health")
+async def check_projects_health(
+    principal: Principal = Depends(get_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Bot admin status for all of the creator's channels in one call.
+    Checks run concurrently (bounded) and are cached per project for a short time.
+    """
+    _require_bot_token()
 
-    chat_id = project.telegram_channel_id
+    rows = await db.execute(
+        select(Project.id, Project.telegram_channel_id)
+        .where(Project.user_id == principal.user_id)
+        .order_by(Project.id)
+    )
+    projects = [(row.id, row.telegram_channel_id) for row in rows]
+    # connection released before the Telegram calls
+    await db.close()
+
+    results = await channel_health.check_channels(projects)
+    return {"projects": [{"project_id": pid, **results[pid]} for pid, _ in projects]}
 
-    # Get bot id
-    me_resp = requests.get(f"https://api.telegram.org/bot{bot_token}/getMe").json()
-    bot_id = me_resp.get("result", {}).get("id")
-    if not bot_id:
-        return {"ok": False, "error": "Cannot get bot id", "response": me_resp}
 
-    # Check bot status in channel
-    resp = requests.get(
-        f"https://api.telegram.org/bot{bot_token}/getChatMember",
-        params={"chat_id": chat_id, "user_id": bot_id},
-    ).json()
+@router.get("/{project_id}/check_bot")
+async def check_bot_status(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Check if the bot is an administrator in the project's Telegram channel.
+    """
+    _require_bot_token()
 
-    status = resp.get("result", {}).get("status")
-    if status in ("administrator", "creator"):
-        return {"ok": True}
+    project = (
+        await db.execute(
+            select(Project.id, Project.telegram_channel_id).where(Project.id == project_id)
+        )
+    ).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    await db.close()
 
-    return {"ok": False, "response": resp}
+    return await channel_health.check_channel(project.id, project.telegram_channel_id)
 
 
 # ==== STEP 1: создать проект (без канала) ====
@@ -98,32 +94,13 @@ def check_bot_status(project_id: int, db: Session = Depends(get_db)):
 @router.post("/", response_model=ProjectRead)
 def create_project(
     payload: ProjectCreate,
-    authorization: str = Header(None),
+    principal: Principal = Depends(get_principal),
     db: Session = Depends(get_db),
 ):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
-
-    token = authorization.split(" ", 1)[1]
-
-    try:
-        payload_jwt = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        sub = payload_jwt.get("sub")
-        if sub is None:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
-        user_id = int(sub)
-    except (JWTError, ValueError):
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    connection_code = secrets.token_hex(3)
-    settings_dict = {"connection_code": connection_code, "status": "pending"}
+    settings_dict = {"status": "pending"}
 
     project = Project(
-        user_id=user.id,
+        user_id=principal.user_id,
         telegram_channel_id=None,
         title=payload.title,
         username=None,
@@ -131,6 +108,9 @@ def create_project(
         settings=settings_dict,
     )
     db.add(project)
+    db.flush()
+    issue_connect_session(db, principal.user_id, project.id)
+    creator_stats.project_created(db, principal.user_id)
     db.commit()
     db.refresh(project)
     return project
@@ -151,18 +131,10 @@ def get_project_connect_link(project_id: int, db: Session = Depends(get_db)):
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    settings_dict = project.settings or {}
-
-    # If connection_code is missing for some reason, generate it
-    connection_code = settings_dict.get("connection_code")
-    if not connection_code:
-        connection_code = secrets.token_hex(3)
-        settings_dict["connection_code"] = connection_code
-        # If status is not set, mark as pending
-        settings_dict.setdefault("status", "pending")
-        project.settings = settings_dict
-        db.commit()
-        db.refresh(project)
+    # Reuses the project's open code, or issues a new one if it expired / was used
+    connect_session = issue_connect_session(db, project.user_id, project.id)
+    connection_code = connect_session.token
+    db.commit()
 
     # Get bot username from settings or fallback to a default value
     bot_username = getattr(settings, "BOT_USERNAME", None) or "oneclicksub_bot"
@@ -184,31 +156,28 @@ def connect_channel(
     after user used /start connect_<connection_code>.
 
     We:
-    - find Project by connection_code stored in settings
+    - consume the connection code (unique index lookup, single use, TTL)
     - save telegram_channel_id
     - update status = "connected"
     """
-    code = payload.connection_code
     chat_id = payload.telegram_channel_id
     title = payload.channel_title
 
-    project = (
-        db.query(Project)
-        .filter(Project.settings["connection_code"].astext == code)
-        .first()
-    )
+    connect_session = consume_connect_session(db, payload.connection_code)
+    project = None
+    if connect_session and connect_session.project_id:
+        project = db.get(Project, connect_session.project_id)
 
     if not project:
-        raise HTTPException(status_code=404, detail="Invalid connection code")
+        raise HTTPException(status_code=404, detail="Invalid or expired connection code")
 
     # Update project
     project.telegram_channel_id = chat_id
     if title:
         project.title = title
 
-    settings_dict = project.settings or {}
-    settings_dict["status"] = "connected"
-    project.settings = settings_dict
+    # new dict: in-place changes of a JSONB value are not detected by SQLAlchemy
+    project.settings = {**(project.settings or {}), "status": "connected"}
 
     db.commit()
     db.refresh(project)
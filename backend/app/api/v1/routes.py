@@ -4,10 +4,12 @@ from app.api.v1 import projects, plans, users, subscriptions
 from app.api.v1 import auth
 from app.api.v1 import bot_integration
 from app.api.v1 import payments
+from app.api.v1 import exports
 
 api_router = APIRouter()
 
 api_router.include_router(projects.router, prefix="/projects", tags=["projects"])
+api_router.include_router(exports.router, prefix="/projects", tags=["exports"])
 api_router.include_router(plans.router, prefix="/plans", tags=["plans"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(subscriptions.router, prefix="/subscriptions", tags=["subscriptions"])
@@ -1,13 +1,22 @@
 ﻿from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_db
+from app.core.deps import get_async_db, get_bot_subscriber, get_db
 from app.models.end_user import EndUser
 from app.models.subscription import Subscription
 from app.models.plan import SubscriptionPlan
 from app.models.project import Project
 from app.schemas.subscription import SubscriptionRead, SubscriptionFromPlanCreate
+from app.services import (
+    creator_stats,
+    expiry_sweeper,
+    plan_catalog,
+    renewals,
+    subscription_cache,
+)
 
 router = APIRouter()
 
@@ -60,42 +69,130 @@ def create_subscription_from_plan(
     )
 
     db.add(subscription)
+    db.flush()
+    creator_stats.subscription_added(db, subscription)
     db.commit()
     db.refresh(subscription)
 
+    subscription_cache.invalidate(payload.telegram_id, plan.project_id)
+
     return subscription
 
 
+# ================================================================
+#   ОТЧЁТ ПОСЛЕДНЕГО ПРОХОДА SWEEPER'А ПРОСРОЧЕННЫХ ПОДПИСОК
+# ================================================================
+@router.get("/sweeper/last-run")
+async def get_sweeper_last_run():
+    """
+    Сколько подписок переведено в expired, сколько пользователей удалено
+    из каналов и сколько это заняло времени.
+    """
+    return {"last_run": expiry_sweeper.get_last_report()}
+
+
+# ================================================================
+#   НАПОМИНАНИЯ О ПРОДЛЕНИИ
+# ================================================================
+@router.get("/renewals/last-run")
+async def get_renewals_last_run():
+    """Сколько напоминаний о продлении отправлено за последний проход."""
+    return {"last_run": renewals.get_last_report()}
+
+
+@router.post("/renewal-reminders")
+async def set_renewal_reminders(
+    project_id: int,
+    enabled: bool,
+    telegram_id: int = Depends(get_bot_subscriber),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Включает/выключает напоминания о продлении для активных подписок
+    пользователя в проекте. Только запрос, подписанный ботом от имени
+    этого telegram_id: меняются лишь его собственные подписки.
+    """
+    end_user_id = (
+        select(EndUser.id).where(EndUser.telegram_id == telegram_id).scalar_subquery()
+    )
+    result = await db.execute(
+        update(Subscription)
+        .where(
+            Subscription.end_user_id == end_user_id,
+            Subscription.project_id == project_id,
+            Subscription.status == "active",
+        )
+        .values(renewal_reminders=enabled)
+    )
+    await db.commit()
+
+    if not result.rowcount:
+        raise HTTPException(status_code=404, detail="No active subscription")
+    return {"ok": True, "renewal_reminders": enabled, "subscriptions": result.rowcount}
+
+
 # ================================================================
 #   НОВЫЙ ВАЖНЕЙШИЙ ЭНДПОИНТ:
 #   ПРОВЕРИТЬ АКТИВНУЮ ПОДПИСКУ ПО telegram_id + project_id
 # ================================================================
 @router.get("/active", response_model=SubscriptionRead)
-def get_active_subscription_for_user(
+async def get_active_subscription_for_user(
     telegram_id: int,
     project_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Вернуть активную подписку для пользователя в проекте.
     Активная = status='active' и end_at > сейчас.
+    Ответ (в том числе "нет подписки") берётся из in-process кэша.
     """
 
-    now = datetime.utcnow()
-
-    subscription = (
-        db.query(Subscription)
-        .join(EndUser, Subscription.end_user_id == EndUser.id)
-        .filter(
-            EndUser.telegram_id == telegram_id,
-            Subscription.project_id == project_id,
-            Subscription.status == "active",
-            Subscription.end_at > now,
-        )
-        .first()
+    subscription = await subscription_cache.get_active_subscription(
+        db, telegram_id, project_id
     )
 
     if not subscription:
         raise HTTPException(status_code=404, detail="No active subscription")
 
     return subscription
+
+
+# ================================================================
+#   ЛЕНДИНГ ПОДПИСКИ ДЛЯ БОТА (/start project_<id>):
+#   АКТИВНАЯ ПОДПИСКА + ТАРИФЫ ПРОЕКТА ЗА ОДИН ЗАПРОС
+# ================================================================
+@router.get("/landing")
+async def get_subscribe_landing(
+    telegram_id: int,
+    project_id: int,
+    keyboard: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Всё, что нужно боту для ответа на /start project_<id>:
+    активная подписка (или null) и активные тарифы проекта.
+    Оба ответа берутся из in-process кэшей, в БД идём только при промахе.
+    keyboard=true — ещё и готовые inline-кнопки покупки (если подписки нет).
+    """
+
+    subscription = await subscription_cache.get_active_subscription(
+        db, telegram_id, project_id
+    )
+    plans = (await plan_catalog.get_project_plans(db, project_id)).data
+
+    response = {"subscription": subscription, "plans": plans}
+    if keyboard:
+        response["keyboard"] = (
+            []
+            if subscription
+            else [
+                [
+                    {
+                        "text": f"{plan['name']} — {plan['price']} {plan['currency']}",
+                        "callback_data": f"buy:{plan['id']}",
+                    }
+                ]
+                for plan in plans
+            ]
+        )
+    return response
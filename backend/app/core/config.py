@@ -12,14 +12,110 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "app"
     POSTGRES_DB: str = "app"
 
+    # Connection pool (per engine, per worker process).
+    # Total connections per worker = (DB_POOL_SIZE + DB_MAX_OVERFLOW) * 2 engines.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds; keep below the server idle timeout
+    DB_POOL_PRE_PING: bool = True
+
     STRIPE_SECRET_KEY: str = os.getenv("STRIPE_SECRET_KEY", "")
     STRIPE_WEBHOOK_SECRET: str = os.getenv("STRIPE_WEBHOOK_SECRET", "")
 
+    # Outgoing Stripe API calls (app.core.stripe_config)
+    STRIPE_MAX_CONCURRENCY: int = 8  # parallel Stripe calls per worker process
+    STRIPE_HTTP_TIMEOUT: float = 10.0  # seconds per HTTP attempt
+    STRIPE_MAX_NETWORK_RETRIES: int = 1
+    STRIPE_QUEUE_TIMEOUT: float = 5.0  # seconds to wait for a free Stripe slot
+
+    # Checkout Session lifetime (Stripe allows 30 min .. 24 h) and how much of it
+    # must be left for an open session to be handed out again
+    STRIPE_CHECKOUT_TTL_MINUTES: int = 60
+    STRIPE_CHECKOUT_REUSE_MIN_LEFT_MINUTES: int = 10
+
+    # Stripe webhook inbox workers (app.services.stripe_inbox)
+    STRIPE_INBOX_WORKERS: int = 2
+    STRIPE_INBOX_BATCH_SIZE: int = 10
+    STRIPE_INBOX_POLL_INTERVAL: float = 2.0  # seconds
+    STRIPE_INBOX_MAX_ATTEMPTS: int = 10
+
     BACKEND_PUBLIC_URL: str = os.getenv("BACKEND_PUBLIC_URL", "")
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "https://fanstero.netlify.app")
 
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "8350395273:AAEFuqUZi7Gpaq1MCzM2Cn3HbmguI37lECg")
 
+    # Telegram Bot API client + outbox (app.services.telegram*)
+    TELEGRAM_HTTP_POOL_SIZE: int = 50
+    TELEGRAM_HTTP_TIMEOUT: float = 10.0  # seconds
+    TELEGRAM_GLOBAL_RATE: float = 30.0  # calls/second for the whole bot
+    TELEGRAM_PER_CHAT_RATE: float = 1.0  # messages/second to one private chat
+    TELEGRAM_PER_GROUP_RATE: float = 20 / 60  # messages/second to one group/channel
+    TELEGRAM_OUTBOX_WORKERS: int = 1
+    TELEGRAM_OUTBOX_BATCH_SIZE: int = 50
+    TELEGRAM_OUTBOX_POLL_INTERVAL: float = 2.0  # seconds
+    TELEGRAM_OUTBOX_MAX_ATTEMPTS: int = 8
+
+    # Channel admin checks (app.services.channel_health)
+    CHANNEL_HEALTH_CACHE_TTL: float = 30.0  # seconds
+    CHANNEL_HEALTH_CACHE_SIZE: int = 10_000
+    CHANNEL_HEALTH_CONCURRENCY: int = 10  # parallel getChatMember calls per request
+
+    # Subscription expiry sweeper (app.services.expiry_sweeper)
+    SUBSCRIPTION_SWEEP_INTERVAL: float = 60.0  # seconds between passes
+    SUBSCRIPTION_SWEEP_BATCH_SIZE: int = 1000
+
+    # Renewal reminders (app.services.renewals): active subscriptions ending
+    # within the lead time get a message with a renewal checkout link, unless
+    # the subscriber turned reminders off
+    RENEWAL_REMINDER_LEAD_HOURS: float = 72.0
+    RENEWAL_SCAN_INTERVAL: float = 300.0  # seconds between passes
+    RENEWAL_BUCKET_MINUTES: int = 60  # the window is scanned in end_at slices
+    RENEWAL_BATCH_SIZE: int = 500
+
+    # Creator balance ledger rollup (app.services.ledger): how often new
+    # entries are folded into balance_snapshots
+    LEDGER_ROLLUP_INTERVAL: float = 60.0  # seconds
+
+    # Payout processing (app.services.payouts). Empty = no payout provider:
+    # the workers are not started and requests stay pending.
+    PAYOUT_BACKEND: str = ""
+    PAYOUT_WORKERS: int = 4
+    PAYOUT_BATCH_SIZE: int = 50
+    PAYOUT_POLL_INTERVAL: float = 5.0  # seconds
+    PAYOUT_MAX_ATTEMPTS: int = 8
+
+    # In-process cache for GET /subscriptions/active (app.services.subscription_cache).
+    # Invalidation is per process, so the negative TTL bounds how long another
+    # worker may still answer "no subscription" right after a payment.
+    ACTIVE_SUBSCRIPTION_CACHE_TTL: float = 300.0
+    ACTIVE_SUBSCRIPTION_NEGATIVE_TTL: float = 15.0
+    ACTIVE_SUBSCRIPTION_CACHE_SIZE: int = 100_000
+
+    # Plan catalog cache (app.services.plan_catalog). Plan edits invalidate only
+    # the worker that made them, so PLAN_CACHE_TTL bounds staleness elsewhere.
+    # Clients may reuse responses for PLAN_CACHE_MAX_AGE, then revalidate (304).
+    PLAN_CACHE_TTL: float = 60.0
+    PLAN_CACHE_SIZE: int = 10_000
+    PLAN_CACHE_MAX_AGE: int = 30
+
+    # Verified JWTs (app.core.security). Revocation is stored in the database
+    # and re-checked on a cache miss, so the TTL bounds how long other workers
+    # may still accept a token after logout.
+    AUTH_TOKEN_CACHE_TTL: float = 60.0
+    AUTH_TOKEN_CACHE_SIZE: int = 10_000
+
+    # users.id allowed to call the operator endpoints (Stripe inbox, payout
+    # metrics), e.g. ADMIN_USER_IDS='[1, 2]'. Empty = nobody.
+    ADMIN_USER_IDS: list[int] = []
+
+    # Streaming exports (app.services.exports): rows fetched per server-side
+    # cursor round trip, i.e. roughly how many rows are held in memory.
+    EXPORT_BATCH_SIZE: int = 2000
+
+    # Channel connection codes (app.services.connect_codes): single use.
+    CONNECT_CODE_TTL_MINUTES: int = 60
+
     SECRET_KEY: str = (
         "4c52f9b0b2a64a0d847d9300dcf742b2a0a6c97f8c1b49e9b6e15a84f3fdc9ad"
     )
@@ -31,6 +127,13 @@ class Settings(BaseSettings):
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> str:
+        return (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+            f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        )
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,6 +1,18 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
-from app.db.session import SessionLocal
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import (
+    InvalidTokenError,
+    Principal,
+    decode_access_token,
+    verify_bot_signature,
+)
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.models.user import User
 
 
 def get_db() -> Generator:
@@ -9,3 +21,66 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_bearer_token(authorization: str | None = Header(None)) -> str:
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(
+            status_code=401, detail="Missing or invalid Authorization header"
+        )
+    return authorization.split(" ", 1)[1]
+
+
+def get_principal(token: str = Depends(get_bearer_token)) -> Principal:
+    """
+    Caller identity from the JWT. Verified tokens are cached, so routes that
+    only need `user_id` depend on this and never touch the database.
+    """
+    try:
+        return decode_access_token(token)
+    except InvalidTokenError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+
+def get_admin_principal(principal: Principal = Depends(get_principal)) -> Principal:
+    """Operator-only routes: the caller must be listed in ADMIN_USER_IDS."""
+    if principal.user_id not in settings.ADMIN_USER_IDS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return principal
+
+
+def get_bot_subscriber(
+    telegram_id: int,
+    x_bot_signature: str | None = Header(None, alias="X-Bot-Signature"),
+) -> int:
+    """
+    Telegram user a bot-signed request acts for. Routes that change a
+    subscriber's own data depend on this instead of trusting `telegram_id`.
+    """
+    if not verify_bot_signature(x_bot_signature, telegram_id):
+        raise HTTPException(status_code=401, detail="Invalid bot signature")
+    return telegram_id
+
+
+def get_current_user(
+    principal: Principal = Depends(get_principal), db: Session = Depends(get_db)
+) -> User:
+    user = db.get(User, principal.user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+async def get_current_user_async(
+    principal: Principal = Depends(get_principal),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    user = await db.get(User, principal.user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
@@ -0,0 +1,42 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Request, Response
+
+
+@dataclass(frozen=True)
+class CachedJSON:
+    """
+    JSON body serialized once, together with a strong ETag over its bytes.
+
+    The ETag depends only on the content, so every worker process produces
+    the same tag for the same data and clients can revalidate against any of them.
+    """
+
+    data: Any
+    body: bytes
+    etag: str
+
+    @classmethod
+    def build(cls, data: Any) -> "CachedJSON":
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+        return cls(data=data, body=body, etag=f'"{hashlib.sha1(body).hexdigest()[:20]}"')
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def conditional_response(request: Request, cached: CachedJSON, max_age: int) -> Response:
+    """200 with the cached body, or an empty 304 if the client already has it."""
+    headers = {"ETag": cached.etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
@@ -1,17 +1,186 @@
-﻿from datetime import datetime, timedelta
-from jose import jwt
+﻿import hashlib
+import hmac
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 
+from jose import JWTError, jwt
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 30  # 30 days
 
 
-def create_access_token(data: dict):
+class InvalidTokenError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Principal:
+    """What a verified access token says about the caller."""
+
+    user_id: int
+    issued_at: float
+    expires_at: float
+    token_version: int = 0
+
+
+def create_access_token(data: dict, token_version: int = 0):
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now, "ver": token_version})
 
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+
+# token -> Principal. Revocation is stored in the database (users.token_version,
+# revoked_tokens) and checked only when a token is not cached here, so another
+# worker sees a logout after at most AUTH_TOKEN_CACHE_TTL.
+verified_tokens = TTLCache(
+    "verified_tokens",
+    ttl=settings.AUTH_TOKEN_CACHE_TTL,
+    max_size=settings.AUTH_TOKEN_CACHE_SIZE,
+)
+
+# user_id -> lowest valid token_version, for tokens this worker still has
+# cached when the user logs out everywhere. Older entries are irrelevant:
+# by then every cached token has been re-checked against the database.
+_min_token_version = TTLCache(
+    "min_token_version",
+    ttl=settings.AUTH_TOKEN_CACHE_TTL,
+    max_size=settings.AUTH_TOKEN_CACHE_SIZE,
+)
+
+
+# Requests the bot makes on behalf of a Telegram user carry
+# X-Bot-Signature: t=<unix time>,v1=<hmac(f"{t}.{telegram_id}")>. The key is
+# derived from the bot token, which only the bot and the backend know.
+BOT_SIGNATURE_TOLERANCE = 300  # seconds
+
+
+def bot_request_signature(telegram_id: int, timestamp: int) -> str:
+    key = hashlib.sha256(f"bot-request:{settings.BOT_TOKEN}".encode()).digest()
+    return hmac.new(key, f"{timestamp}.{telegram_id}".encode(), hashlib.sha256).hexdigest()
+
+
+def verify_bot_signature(header: str | None, telegram_id: int) -> bool:
+    try:
+        parts = dict(item.split("=", 1) for item in (header or "").split(","))
+        timestamp = int(parts["t"])
+        signature = parts["v1"]
+    except (KeyError, ValueError):
+        return False
+
+    if abs(time.time() - timestamp) > BOT_SIGNATURE_TOLERANCE:
+        return False
+    return hmac.compare_digest(signature, bot_request_signature(telegram_id, timestamp))
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _is_revoked(token: str, principal: Principal) -> bool:
+    """Database check, done once per token per cache TTL."""
+    with SessionLocal() as db:
+        row = db.execute(
+            select(
+                User.token_version,
+                select(RevokedToken.token_hash)
+                .where(RevokedToken.token_hash == _token_hash(token))
+                .exists(),
+            ).where(User.id == principal.user_id)
+        ).first()
+
+    if row is None:
+        return True
+    token_version, revoked = row
+    return revoked or principal.token_version < token_version
+
+
+def decode_access_token(token: str) -> Principal:
+    """
+    Verifies the JWT once and then serves the result from `verified_tokens`.
+    Raises InvalidTokenError for bad, expired or revoked tokens.
+    """
+    principal = verified_tokens.get(token)
+
+    if principal is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            user_id = int(payload["sub"])
+            expires_at = float(payload["exp"])
+            token_version = int(payload.get("ver", 0))
+        except (JWTError, KeyError, TypeError, ValueError):
+            raise InvalidTokenError("Invalid token")
+
+        # tokens issued before "iat" existed count as issued at the epoch
+        principal = Principal(
+            user_id=user_id,
+            issued_at=float(payload.get("iat", 0)),
+            expires_at=expires_at,
+            token_version=token_version,
+        )
+        if _is_revoked(token, principal):
+            raise InvalidTokenError("Token revoked")
+        verified_tokens.set(token, principal, ttl=expires_at - time.time())
+
+    elif principal.expires_at <= time.time():
+        verified_tokens.delete(token)
+        raise InvalidTokenError("Token expired")
+
+    elif principal.token_version < _min_token_version.get(principal.user_id, 0):
+        verified_tokens.delete(token)
+        raise InvalidTokenError("Token revoked")
+
+    return principal
+
+
+def revoke_token(db: Session, token: str) -> None:
+    """Revokes one token. The caller commits."""
+    try:
+        claims = jwt.get_unverified_claims(token)
+        user_id = int(claims["sub"])
+        expires_at = datetime.utcfromtimestamp(float(claims["exp"]))
+    except (JWTError, KeyError, TypeError, ValueError):
+        return
+
+    now = datetime.utcnow()
+    # заодно чистим истёкшие записи этого пользователя
+    db.execute(
+        delete(RevokedToken).where(
+            RevokedToken.user_id == user_id, RevokedToken.expires_at <= now
+        )
+    )
+    db.execute(
+        insert(RevokedToken)
+        .values(token_hash=_token_hash(token), user_id=user_id, expires_at=expires_at)
+        .on_conflict_do_nothing()
+    )
+    verified_tokens.delete(token)
+
+
+def revoke_user_tokens(db: Session, user_id: int) -> None:
+    """
+    Voids every token issued to the user so far (e.g. "log out everywhere").
+    Tokens issued afterwards carry the new version. The caller commits.
+    """
+    token_version = db.scalar(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_version=User.token_version + 1)
+        .returning(User.token_version)
+    )
+    if token_version is not None:
+        _min_token_version.set(user_id, token_version)
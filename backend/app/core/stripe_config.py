@@ -1,7 +1,28 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import stripe
 from app.core.config import settings
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
+stripe.max_network_retries = settings.STRIPE_MAX_NETWORK_RETRIES
+# keep-alive HTTP client with a hard timeout instead of the 80s default
+stripe.default_http_client = stripe.new_default_http_client(
+    timeout=settings.STRIPE_HTTP_TIMEOUT
+)
+
+# stripe-python is synchronous: calls run in a bounded thread pool so
+# they never block the event loop.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.STRIPE_MAX_CONCURRENCY,
+    thread_name_prefix="stripe",
+)
+_slots = asyncio.Semaphore(settings.STRIPE_MAX_CONCURRENCY)
+
+
+class StripeUnavailableError(Exception):
+    """Stripe is too slow or all Stripe slots are busy."""
 
 
 def create_checkout_session(
@@ -10,7 +31,15 @@ def create_checkout_session(
     plan_id: int,
     project_id: int,
     telegram_id: int,
+    expires_at: int | None = None,
+    idempotency_key: str | None = None,
 ):
+    options = {}
+    if expires_at is not None:
+        options["expires_at"] = expires_at
+    if idempotency_key:
+        options["idempotency_key"] = idempotency_key
+
     session = stripe.checkout.Session.create(
         payment_method_types=["card"],
         mode="payment",
@@ -34,5 +63,56 @@ def create_checkout_session(
             "project_id": str(project_id),
             "telegram_id": str(telegram_id),
         },
+        **options,
     )
     return session
+
+
+async def run_stripe_call(func, *args, **kwargs):
+    """
+    Runs a blocking stripe-python call in the Stripe thread pool.
+
+    - waits at most STRIPE_QUEUE_TIMEOUT for a free slot
+    - gives up waiting on the result after STRIPE_HTTP_TIMEOUT (+ retries)
+    The slot is released only when the thread really finishes, so a hung
+    request can never push more than STRIPE_MAX_CONCURRENCY calls onto Stripe.
+    """
+    try:
+        await asyncio.wait_for(_slots.acquire(), timeout=settings.STRIPE_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise StripeUnavailableError("Too many concurrent Stripe requests")
+
+    loop = asyncio.get_running_loop()
+    try:
+        future = loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+
+    timeout = settings.STRIPE_HTTP_TIMEOUT * (settings.STRIPE_MAX_NETWORK_RETRIES + 1)
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise StripeUnavailableError("Stripe did not respond in time")
+
+
+async def create_checkout_session_async(
+    amount: float,
+    currency: str,
+    plan_id: int,
+    project_id: int,
+    telegram_id: int,
+    expires_at: int | None = None,
+    idempotency_key: str | None = None,
+):
+    return await run_stripe_call(
+        create_checkout_session,
+        amount=amount,
+        currency=currency,
+        plan_id=plan_id,
+        project_id=project_id,
+        telegram_id=telegram_id,
+        expires_at=expires_at,
+        idempotency_key=idempotency_key,
+    )
@@ -1,4 +1,4 @@
-# Import all models here for Alembic and metadata
+﻿# Import all models here for Alembic and metadata
 from app.db.base_class import Base  # noqa
 from app.models.user import User  # noqa
 from app.models.project import Project  # noqa
@@ -8,3 +8,8 @@ from app.models.subscription import Subscription  # noqa
 from app.models.payment import Payment  # noqa
 from app.models.connect_session import ConnectSession
 from app.models.payout import PayoutRequest
+from app.models.stripe_event import StripeEvent  # noqa
+from app.models.telegram_outbox import TelegramOutbox  # noqa
+from app.models.stats import CreatorStats, ProjectStats  # noqa
+from app.models.ledger import BalanceSnapshot, LedgerEntry  # noqa
+from app.models.revoked_token import RevokedToken  # noqa
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class _TimedPoolMixin:
+    """
+    Measures how long callers wait to get a connection out of the pool.
+
+    Wait time includes opening a new overflow connection, which is what a
+    request actually pays when the pool is exhausted.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            outcome = "timeouts"
+            raise
+        except Exception:
+            outcome = "errors"
+            raise
+        finally:
+            self._record_wait(time.perf_counter() - started, outcome)
+
+    def _record_wait(self, seconds: float, outcome: str) -> None:
+        lock = self.__dict__.setdefault("_stats_lock", threading.Lock())
+        with lock:
+            stats = self.__dict__.setdefault("_wait_stats", _empty_wait_stats())
+            stats["acquired"] += 1
+            stats["wait_total_s"] += seconds
+            stats["wait_max_s"] = max(stats["wait_max_s"], seconds)
+            if outcome != "ok":
+                stats[outcome] += 1
+
+    def stats(self) -> dict:
+        lock = self.__dict__.setdefault("_stats_lock", threading.Lock())
+        with lock:
+            wait = dict(self.__dict__.get("_wait_stats") or _empty_wait_stats())
+
+        acquired = wait["acquired"]
+        return {
+            "pool_size": self.size(),
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "timeout_s": self._timeout,
+            "acquired_total": acquired,
+            "timeouts_total": wait["timeouts"],
+            "errors_total": wait["errors"],
+            "wait_avg_ms": round(wait["wait_total_s"] / acquired * 1000, 3)
+            if acquired
+            else 0.0,
+            "wait_max_ms": round(wait["wait_max_s"] * 1000, 3),
+        }
+
+
+def _empty_wait_stats() -> dict:
+    return {
+        "acquired": 0,
+        "timeouts": 0,
+        "errors": 0,
+        "wait_total_s": 0.0,
+        "wait_max_s": 0.0,
+    }
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
@@ -1,11 +1,39 @@
 ﻿from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.pool import TimedAsyncAdaptedQueuePool, TimedQueuePool
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, future=True)
+POOL_OPTIONS = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+engine = create_engine(
+    settings.SQLALCHEMY_DATABASE_URI,
+    future=True,
+    poolclass=TimedQueuePool,
+    **POOL_OPTIONS,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine (asyncpg) for async def routes: queries do not block the event loop.
+async_engine = create_async_engine(
+    settings.SQLALCHEMY_ASYNC_DATABASE_URI,
+    poolclass=TimedAsyncAdaptedQueuePool,
+    **POOL_OPTIONS,
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 def get_db():
     """
     Dependency для FastAPI: открывает сессию к БД и закрывает её после запроса.
@@ -14,4 +42,22 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """
+    Async-вариант get_db для async def эндпоинтов.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_pool_stats() -> dict:
+    """
+    Снимок состояния пулов соединений (sync и async движков).
+    """
+    return {
+        "sync": engine.pool.stats(),
+        "async": async_engine.sync_engine.pool.stats(),
+    }
@@ -5,14 +5,20 @@ from app.core.config import settings
 from app.api.v1.routes import api_router
 from app.api.v1 import payments
 
-# 👉 новые важные импорты
-from app.db.base_class import Base
-from app.db.session import engine
-from app.models import user, project, plan, subscription, payment, end_user  # noqa: F401
+from app.core.cache import caches
+from app.db import base  # noqa: F401  (регистрирует все модели)
+from app.db.session import get_pool_stats
+from app.services.expiry_sweeper import worker_pool as expiry_sweeper
+from app.services.ledger import worker_pool as ledger_rollup
+from app.services import payouts, renewals
+from app.services.payouts import worker_pool as payout_workers
+from app.services.renewals import worker_pool as renewal_reminders
+from app.services.stripe_inbox import worker_pool as stripe_inbox_workers
+from app.services.telegram import telegram_client
+from app.services.channel_health import load_bot_identity
+from app.services.telegram_outbox import worker_pool as telegram_outbox_workers
 
-
-# 👉 здесь один раз создаём все таблицы, если их нет
-Base.metadata.create_all(bind=engine)
+# Схема БД управляется миграциями (alembic upgrade head), а не при импорте.
 
 
 app = FastAPI(title=settings.PROJECT_NAME)
@@ -29,6 +35,47 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 app.include_router(payments.router, prefix="/api/v1/payments", tags=["payments"])
 
 
+@app.on_event("startup")
+async def start_background_workers():
+    await telegram_client.start()
+    await load_bot_identity()
+    stripe_inbox_workers.start()
+    telegram_outbox_workers.start()
+    expiry_sweeper.start()
+    ledger_rollup.start()
+    if payouts.backend is not None:
+        payout_workers.start()
+    else:
+        print("[PAYOUTS] ⚠ PAYOUT_BACKEND is not set, payout workers are not started")
+    if renewals.links_configured():
+        renewal_reminders.start()
+    else:
+        print("[RENEWALS] ⚠ BACKEND_PUBLIC_URL is not an https URL, reminders are not started")
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await expiry_sweeper.stop()
+    await ledger_rollup.stop()
+    await payout_workers.stop()
+    await renewal_reminders.stop()
+    await stripe_inbox_workers.stop()
+    await telegram_outbox_workers.stop()
+    await telegram_client.close()
+
+
 @app.get("/")
 async def root():
     return {"status": "ok", "name": settings.PROJECT_NAME}
+
+
+@app.get("/health/db")
+async def db_health():
+    """Connection pool usage: checked out / idle / overflow and wait times."""
+    return get_pool_stats()
+
+
+@app.get("/health/cache")
+async def cache_health():
+    """Size and hit/miss counters of the in-process caches."""
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -8,6 +8,12 @@ from app.models.user import User
 
 
 class ConnectSession(Base):
+    """
+    Одноразовый код привязки канала (deep link t.me/<bot>?start=connect_<token>).
+    Поиск — по уникальному индексу на token; код живёт до expires_at
+    и гасится при первом использовании (is_completed).
+    """
+
     __tablename__ = "connect_sessions"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -19,6 +25,9 @@ class ConnectSession(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     user = relationship(User, backref="connect_sessions")
 
+    # проект, к которому привяжется канал (None -> проект создаётся при привязке)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=True, index=True)
+
     # телеграм-id автора (заполним, когда бот впервые от него напишет)
     telegram_user_id = Column(BigInteger, nullable=True, index=True)
 
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, Text, text
+
+from app.db.base_class import Base
+
+
+class LedgerEntry(Base):
+    """
+    Append-only history of a creator's balance (app.services.ledger).
+    Rows are never updated; a correction is a new "adjustment" entry.
+    """
+
+    __tablename__ = "balance_ledger"
+
+    id = Column(BigInteger, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # payment_credit / platform_fee / payout_debit / adjustment
+    entry_type = Column(String(20), nullable=False)
+    # со знаком: начисления > 0, комиссия и выплаты < 0
+    amount_cents = Column(BigInteger, nullable=False)
+
+    payment_id = Column(Integer, ForeignKey("payments.id"), nullable=True)
+    payout_id = Column(Integer, ForeignKey("payout_requests.id"), nullable=True)
+    note = Column(Text, nullable=True)
+
+    # id транзакции, записавшей строку: по нему rollup понимает,
+    # какие записи уже точно закоммичены (см. BalanceSnapshot.horizon_txid)
+    txid = Column(
+        BigInteger,
+        nullable=False,
+        server_default=text("(pg_current_xact_id()::text)::bigint"),
+    )
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # баланс = снимок + записи после горизонта снимка
+        Index("ix_balance_ledger_user_txid", "user_id", "txid"),
+        # rollup: только записи после предыдущего горизонта
+        Index("ix_balance_ledger_txid", "txid"),
+        # история для креатора: keyset (created_at, id)
+        Index("ix_balance_ledger_user_created_id", "user_id", "created_at", "id"),
+    )
+
+
+class BalanceSnapshot(Base):
+    """
+    Rolled-up balance: the sum of all of the user's ledger entries written by
+    transactions with txid < horizon_txid. Maintained by the ledger rollup.
+    """
+
+    __tablename__ = "balance_snapshots"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    balance_cents = Column(BigInteger, nullable=False)
+    horizon_txid = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
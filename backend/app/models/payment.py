@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, BigInteger, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, BigInteger, ForeignKey, Index
 from sqlalchemy.sql import func
 
 from app.db.base_class import Base
@@ -14,6 +14,11 @@ class Payment(Base):
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
 
     stripe_session_id = Column(String(255), unique=True, index=True, nullable=False)
+    checkout_url = Column(String, nullable=True)
+    # до какого момента Stripe Checkout Session можно оплатить
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+    # ключ от клиента (повторный запрос с тем же ключом вернёт тот же платёж)
+    idempotency_key = Column(String(255), nullable=True)
 
     amount = Column(Float, nullable=False)
     currency = Column(String(10), nullable=False)
@@ -26,4 +31,24 @@ class Payment(Base):
         DateTime(timezone=True),
         server_default=func.now(),
         onupdate=func.now(),
-    )
\ No newline at end of file
+    )
+
+    __table_args__ = (
+        # повторные "buy" тапы: ищем открытую сессию по (telegram_id, plan_id)
+        Index(
+            "ix_payments_checkout_reuse",
+            "telegram_id",
+            "plan_id",
+            "status",
+            "expires_at",
+        ),
+        Index("ix_payments_idempotency_key", "idempotency_key", unique=True),
+        # история платежей по проекту: keyset (created_at, id) внутри статуса
+        Index(
+            "ix_payments_project_status_created_id",
+            "project_id",
+            "status",
+            "created_at",
+            "id",
+        ),
+    )
@@ -1,5 +1,5 @@
 ﻿from datetime import datetime
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -16,7 +16,8 @@ class PayoutRequest(Base):
     # сколько вывести, в центах
     amount_cents = Column(BigInteger, nullable=False)
 
-    # pending / approved / paid / rejected
+    # pending / processing / paid / failed / rejected
+    # (обработка — app.services.payouts)
     status = Column(String, default="pending", nullable=False)
 
     # snapshot реквизитов на момент заявки
@@ -25,3 +26,20 @@ class PayoutRequest(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     processed_at = Column(DateTime, nullable=True)
+
+    # обработка воркерами, как у stripe_events
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        server_default=text("(now() AT TIME ZONE 'utc')"),
+        nullable=False,
+    )
+    locked_until = Column(DateTime, nullable=True)
+    # id перевода у платёжного провайдера
+    external_reference = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        Index("ix_payout_requests_status_next_attempt", "status", "next_attempt_at"),
+    )
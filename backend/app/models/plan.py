@@ -1,4 +1,4 @@
-﻿from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey
+﻿from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -19,10 +19,16 @@ class SubscriptionPlan(Base):
     project = relationship(
         "Project",
         backref="plans",   # <-- вместо back_populates
-        lazy="joined",
+        # ответы по тарифам проект не используют -> без join на каждый запрос
+        lazy="select",
     )
     subscriptions = relationship("Subscription", back_populates="plan")
 
+    __table_args__ = (
+        # список активных тарифов проекта
+        Index("ix_plans_project_active", "project_id", "active"),
+    )
+
 
 # чтобы работали оба импорта:
 #   from app.models.plan import SubscriptionPlan
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from app.db.base_class import Base
+
+
+class RevokedToken(Base):
+    """
+    Access tokens revoked one by one (logout). Checked when a worker verifies
+    a token it has not cached yet; rows are useless once the token expires.
+    """
+
+    __tablename__ = "revoked_tokens"
+
+    # sha256(token)
+    token_hash = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False)
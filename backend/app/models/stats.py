@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db.base_class import Base
+
+
+class CreatorStats(Base):
+    """
+    Counters for the creator dashboard, maintained incrementally by the
+    payment webhook, the expiry sweeper and project creation
+    (app.services.creator_stats). Can be recomputed from scratch with
+    `python -m app.services.creator_stats`.
+    """
+
+    __tablename__ = "creator_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    projects = Column(Integer, nullable=False, default=0)
+    # уникальные end_user с подпиской status='active' на любой из проектов
+    active_subscribers = Column(Integer, nullable=False, default=0)
+    paid_payments = Column(Integer, nullable=False, default=0)
+    # {"EUR": 129900, "USD": 4500} — целые минорные единицы по каждой валюте
+    revenue_minor = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ProjectStats(Base):
+    __tablename__ = "project_stats"
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+
+    active_subscribers = Column(Integer, nullable=False, default=0)
+    paid_payments = Column(Integer, nullable=False, default=0)
+    revenue_minor = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
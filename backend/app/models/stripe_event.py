@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db.base_class import Base
+
+
+class StripeEvent(Base):
+    """
+    Inbox for Stripe webhook events.
+
+    The webhook endpoint only verifies the signature and stores the event here;
+    background workers (app.services.stripe_inbox) do the actual processing.
+    """
+
+    __tablename__ = "stripe_events"
+
+    # Stripe event id (evt_...) -> повторная доставка того же события не создаёт дубль
+    id = Column(String(255), primary_key=True)
+    type = Column(String(255), nullable=False)
+    payload = Column(JSONB, nullable=False)
+
+    # pending / processing / processed / failed
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    received_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # когда событие можно брать в работу (backoff после ошибки)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # lease: если воркер упал, событие снова станет доступно после этого момента
+    locked_until = Column(DateTime, nullable=True)
+    processed_at = Column(DateTime, nullable=True)
+    # время работы обработчика для последней попытки
+    processing_ms = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index("ix_stripe_events_status_next_attempt", "status", "next_attempt_at"),
+    )
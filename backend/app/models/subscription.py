@@ -1,5 +1,5 @@
 ﻿from datetime import datetime
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Boolean
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Boolean, Index, text, true
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -20,3 +20,29 @@ class Subscription(Base):
     end_at = Column(DateTime, nullable=False)
     status = Column(String, default="active")  # active / expired / canceled
     auto_renew = Column(Boolean, default=False)
+    # напоминать о продлении перед окончанием (app.services.renewals);
+    # отдельно от auto_renew, подписчик может отключить
+    renewal_reminders = Column(Boolean, nullable=False, default=True, server_default=true())
+    # когда ушло напоминание о продлении; сбрасывается при продлении
+    renewal_reminded_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # range scan для sweeper'а: status='active' AND end_at <= now
+        Index("ix_subscriptions_status_end_at", "status", "end_at"),
+        # проверка активной подписки пользователя в проекте
+        Index(
+            "ix_subscriptions_user_project_status_end_at",
+            "end_user_id",
+            "project_id",
+            "status",
+            "end_at",
+        ),
+        # напоминания о продлении: только те, кому ещё предстоит напомнить
+        Index(
+            "ix_subscriptions_renewal_due",
+            "end_at",
+            postgresql_where=text(
+                "status = 'active' AND renewal_reminders AND renewal_reminded_at IS NULL"
+            ),
+        ),
+    )
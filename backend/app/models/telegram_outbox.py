@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, Index
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db.base_class import Base
+
+
+class TelegramOutbox(Base):
+    """
+    Outgoing Telegram Bot API calls (sendMessage, banChatMember, ...).
+
+    Rows are written in the same transaction as the business change that
+    caused them and delivered by app.services.telegram_outbox.
+    """
+
+    __tablename__ = "telegram_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Bot API method, например "sendMessage"
+    method = Column(String(64), nullable=False, default="sendMessage")
+    # chat, в который уходит вызов: по нему работает per-chat rate limit
+    chat_id = Column(BigInteger, nullable=False)
+    payload = Column(JSONB, nullable=False)
+
+    # pending / sending / sent / failed
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_until = Column(DateTime, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_telegram_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
@@ -13,12 +13,17 @@ class User(Base):
     language = Column(String, default="en")
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # "выйти везде": +1 отзывает все выданные ранее токены (claim "ver")
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     # OLD: for Stripe Connect (можем не использовать, но пусть лежит на будущее)
     stripe_account_id = Column(String, nullable=True)
     stripe_onboarded = Column(Boolean, default=False)
 
     # NEW: внутренний кошелёк и реквизиты для выплат
     # баланс храним в центах, чтобы не ловить проблемы с float
+    # DEPRECATED: баланс теперь считается по balance_ledger (app.services.ledger);
+    # значение перенесено туда миграцией 0007 и больше не обновляется
     balance_cents = Column(BigInteger, nullable=False, server_default="0")
 
     # пример: "sepa", "revolut", "wise", "paypal", "crypto" и т.п.
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from decimal import Decimal
+from typing import Optional
 
 
 class PlanBase(BaseModel):
@@ -14,6 +15,14 @@ class PlanCreate(PlanBase):
     project_id: int
 
 
+class PlanUpdate(BaseModel):
+    name: Optional[str] = None
+    price: Optional[Decimal] = None
+    currency: Optional[str] = None
+    duration_days: Optional[int] = None
+    active: Optional[bool] = None
+
+
 class PlanRead(PlanBase):
     id: int
     project_id: int
@@ -19,7 +19,7 @@ class ProjectCreate(ProjectBase):
 class ProjectRead(ProjectBase):
     id: int
     user_id: int
-    # frontend can read connection_code and status from settings
+    # frontend can read the connection status from settings
     settings: dict | None = None
 
     class Config:
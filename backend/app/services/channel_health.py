@@ -0,0 +1,84 @@
+import asyncio
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.telegram import TelegramAPIError, telegram_client
+
+ADMIN_STATUSES = ("administrator", "creator")
+
+# (project_id, telegram_channel_id) -> результат проверки
+channel_health = TTLCache(
+    "channel_health",
+    ttl=settings.CHANNEL_HEALTH_CACHE_TTL,
+    max_size=settings.CHANNEL_HEALTH_CACHE_SIZE,
+)
+
+# id бота не меняется — getMe делаем один раз за процесс
+_bot_id: int | None = None
+_bot_id_lock = asyncio.Lock()
+
+
+async def load_bot_identity() -> int | None:
+    """Вызывается на старте; ошибка не роняет приложение — повторим при первой проверке."""
+    try:
+        return await get_bot_id()
+    except TelegramAPIError as e:
+        print(f"[HEALTH] ⚠ getMe failed, will retry on demand: {e}")
+        return None
+
+
+async def get_bot_id() -> int:
+    global _bot_id
+    if _bot_id is None:
+        async with _bot_id_lock:
+            if _bot_id is None:
+                me = await telegram_client.call("getMe", {})
+                _bot_id = me["id"]
+    return _bot_id
+
+
+async def check_channel(project_id: int, chat_id: int | None) -> dict:
+    """
+    Бот — админ канала проекта? Результат (в том числе отрицательный)
+    кэшируется на CHANNEL_HEALTH_CACHE_TTL.
+    """
+    if not chat_id:
+        return {"ok": False, "error": "Channel not configured"}
+
+    key = (project_id, chat_id)
+    cached = channel_health.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        # chat_id не передаём: это не отправка сообщения, per-chat лимит не нужен
+        member = await telegram_client.call(
+            "getChatMember", {"chat_id": chat_id, "user_id": await get_bot_id()}
+        )
+    except TelegramAPIError as e:
+        result = {"ok": False, "error": e.description}
+        if e.retryable:
+            # временная ошибка Telegram — не запоминаем
+            return result
+    else:
+        status = member.get("status")
+        result = {"ok": status in ADMIN_STATUSES, "status": status}
+
+    channel_health.set(key, result)
+    return result
+
+
+async def check_channels(projects: list[tuple[int, int | None]]) -> dict[int, dict]:
+    """
+    Проверяет сразу несколько проектов: параллельно, но не больше
+    CHANNEL_HEALTH_CONCURRENCY запросов к Telegram одновременно.
+    """
+    semaphore = asyncio.Semaphore(settings.CHANNEL_HEALTH_CONCURRENCY)
+
+    async def one(project_id: int, chat_id: int | None) -> dict:
+        async with semaphore:
+            return await check_channel(project_id, chat_id)
+
+    results = await asyncio.gather(*(one(pid, chat_id) for pid, chat_id in projects))
+    return {pid: result for (pid, _), result in zip(projects, results)}
+
@@ -0,0 +1,195 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.stripe_config import create_checkout_session_async
+from app.models.payment import Payment
+from app.services import plan_catalog
+
+
+async def find_open_checkout(
+    db: AsyncSession, telegram_id: int, plan_id: int
+) -> Payment | None:
+    """
+    Pending-платёж этого пользователя по этому плану, который ещё можно оплатить.
+    Один индексный lookup по ix_payments_checkout_reuse.
+    """
+    min_expires_at = datetime.now(timezone.utc) + timedelta(
+        minutes=settings.STRIPE_CHECKOUT_REUSE_MIN_LEFT_MINUTES
+    )
+    return await db.scalar(
+        select(Payment)
+        .where(
+            Payment.telegram_id == telegram_id,
+            Payment.plan_id == plan_id,
+            Payment.status == "pending",
+            Payment.expires_at > min_expires_at,
+            Payment.checkout_url.is_not(None),
+        )
+        .order_by(Payment.expires_at.desc())
+        .limit(1)
+    )
+
+
+# Сколько живёт резерв без ссылки: дольше любого вызова Stripe
+# (ожидание слота + таймаут на каждую попытку).
+RESERVATION_TTL = timedelta(
+    seconds=settings.STRIPE_QUEUE_TIMEOUT
+    + settings.STRIPE_HTTP_TIMEOUT * (settings.STRIPE_MAX_NETWORK_RETRIES + 1)
+)
+
+
+async def find_reservation(
+    db: AsyncSession, telegram_id: int, plan_id: int
+) -> Payment | None:
+    """Свежий резерв, для которого сессию в Stripe ещё создают."""
+    return await db.scalar(
+        select(Payment)
+        .where(
+            Payment.telegram_id == telegram_id,
+            Payment.plan_id == plan_id,
+            Payment.status == "pending",
+            Payment.checkout_url.is_(None),
+            Payment.created_at > datetime.now(timezone.utc) - RESERVATION_TTL,
+        )
+        .order_by(Payment.id.desc())
+        .limit(1)
+    )
+
+
+async def complete_checkout(db: AsyncSession, payment: Payment) -> Payment:
+    """
+    Создаёт Checkout Session для резерва и записывает ссылку.
+    Ключ идемпотентности в Stripe привязан к резерву, поэтому параллельные
+    запросы по одному резерву получают одну и ту же сессию.
+    Транзакция на время вызова Stripe не открыта.
+    """
+    try:
+        session = await create_checkout_session_async(
+            amount=payment.amount,
+            currency=payment.currency,
+            plan_id=payment.plan_id,
+            project_id=payment.project_id,
+            telegram_id=payment.telegram_id,
+            expires_at=int(payment.expires_at.timestamp()),
+            idempotency_key=f"checkout-{payment.id}",
+        )
+    except Exception:
+        # резерв больше не нужен: следующий тап создаст новый
+        await db.execute(
+            update(Payment)
+            .where(Payment.id == payment.id, Payment.checkout_url.is_(None))
+            .values(status="failed")
+        )
+        await db.commit()
+        raise
+
+    payment = await db.scalar(
+        update(Payment)
+        .where(Payment.id == payment.id)
+        .values(stripe_session_id=session.id, checkout_url=session.url)
+        .returning(Payment)
+        .execution_options(populate_existing=True)
+    )
+    await db.commit()
+    return payment
+
+
+async def get_or_create_checkout(
+    db: AsyncSession,
+    telegram_id: int,
+    plan_id: int,
+    project_id: int,
+    amount: float,
+    currency: str,
+    idempotency_key: str | None = None,
+) -> tuple[Payment, bool]:
+    """
+    Возвращает (payment, reused).
+
+    1. Запрос с уже известным Idempotency-Key → тот же платёж.
+    2. Есть открытая Checkout Session для (telegram_id, plan_id) → её и отдаём.
+    3. Иначе резервируем pending-платёж (короткая транзакция), затем
+       создаём сессию в Stripe и второй короткой транзакцией пишем ссылку.
+    """
+    if idempotency_key:
+        payment = await db.scalar(
+            select(Payment).where(Payment.idempotency_key == idempotency_key)
+        )
+        if payment is not None:
+            if payment.telegram_id != telegram_id or payment.plan_id != plan_id:
+                raise HTTPException(
+                    status_code=409,
+                    detail="Idempotency-Key was already used for another checkout",
+                )
+            if payment.checkout_url is None and payment.status == "pending":
+                await db.commit()
+                payment = await complete_checkout(db, payment)
+            return payment, True
+
+    payment = await find_open_checkout(db, telegram_id, plan_id)
+    if payment is not None:
+        return payment, True
+
+    # Двойной тап: второй запрос ждёт первый на этой блокировке только до
+    # коммита резерва (не до ответа Stripe), а затем находит этот резерв.
+    lock_key = func.hashtextextended(f"checkout:{telegram_id}:{plan_id}", 0)
+    await db.execute(select(func.pg_advisory_xact_lock(lock_key)))
+    payment = await find_open_checkout(db, telegram_id, plan_id)
+    if payment is not None:
+        await db.commit()
+        return payment, True
+
+    payment = await find_reservation(db, telegram_id, plan_id)
+    reused = payment is not None
+    if payment is None:
+        payment = Payment(
+            telegram_id=telegram_id,
+            plan_id=plan_id,
+            project_id=project_id,
+            # настоящий id сессии появится после ответа Stripe
+            stripe_session_id=f"reserved:{uuid.uuid4().hex}",
+            expires_at=datetime.now(timezone.utc)
+            + timedelta(minutes=settings.STRIPE_CHECKOUT_TTL_MINUTES),
+            idempotency_key=idempotency_key,
+            amount=amount,
+            currency=currency,
+            status="pending",
+        )
+        db.add(payment)
+        await db.flush()
+    # коммит отпускает блокировку и соединение до вызова Stripe
+    await db.commit()
+
+    payment = await complete_checkout(db, payment)
+    return payment, reused
+
+
+async def checkout_for_plan(
+    db: AsyncSession,
+    telegram_id: int,
+    plan_id: int,
+    idempotency_key: str | None = None,
+) -> tuple[Payment, bool]:
+    """
+    Checkout по одному plan_id: цена, валюта и проект берутся из
+    (кэшированного) тарифа на сервере, клиент их не передаёт.
+    """
+    cached = await plan_catalog.get_plan(db, plan_id)
+    if cached is None or not cached.data["active"]:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    plan = cached.data
+
+    return await get_or_create_checkout(
+        db,
+        telegram_id=telegram_id,
+        plan_id=plan_id,
+        project_id=plan["project_id"],
+        amount=float(plan["price"]),
+        currency=plan["currency"],
+        idempotency_key=idempotency_key,
+    )
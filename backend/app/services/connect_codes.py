@@ -0,0 +1,70 @@
+import secrets
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.connect_session import ConnectSession
+
+
+def new_connect_token() -> str:
+    # 128 бит; deep link start-параметр допускает [A-Za-z0-9_-] до 64 символов
+    return secrets.token_urlsafe(16)
+
+
+def issue_connect_session(
+    db: Session, user_id: int, project_id: int | None = None
+) -> ConnectSession:
+    """
+    Открытый код привязки для проекта: повторно отдаёт ещё действующий,
+    иначе создаёт новый. Коммитит вызывающий код.
+    """
+    now = datetime.utcnow()
+
+    if project_id is not None:
+        session = db.scalar(
+            select(ConnectSession)
+            .where(
+                ConnectSession.project_id == project_id,
+                ConnectSession.is_completed == False,  # noqa: E712
+                # чтобы код не истёк, пока пользователь идёт в бота
+                ConnectSession.expires_at > now + timedelta(minutes=5),
+            )
+            .order_by(ConnectSession.expires_at.desc())
+            .limit(1)
+        )
+        if session:
+            return session
+
+    session = ConnectSession(
+        token=new_connect_token(),
+        user_id=user_id,
+        project_id=project_id,
+        is_completed=False,
+        created_at=now,
+        expires_at=now + timedelta(minutes=settings.CONNECT_CODE_TTL_MINUTES),
+    )
+    db.add(session)
+    db.flush()
+    return session
+
+
+def consume_connect_session(
+    db: Session, token: str, telegram_user_id: int | None = None
+) -> ConnectSession | None:
+    """
+    Гасит код одним UPDATE по уникальному индексу: из нескольких
+    одновременных попыток пройдёт только одна. None — кода нет,
+    он истёк или уже использован.
+    """
+    return db.scalar(
+        update(ConnectSession)
+        .where(
+            ConnectSession.token == token,
+            ConnectSession.is_completed == False,  # noqa: E712
+            ConnectSession.expires_at > datetime.utcnow(),
+        )
+        .values(is_completed=True, telegram_user_id=telegram_user_id)
+        .returning(ConnectSession)
+    )
@@ -0,0 +1,318 @@
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Integer, String, cast, delete, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.end_user import EndUser
+from app.models.payment import Payment
+from app.models.project import Project
+from app.models.stats import CreatorStats, ProjectStats
+from app.models.subscription import Subscription
+
+# Все функции синхронные и работают в транзакции вызывающего кода (ничего
+# не коммитят). Из async-кода: await db.run_sync(creator_stats.payment_paid, payment)
+#
+# "Активный подписчик" здесь = есть подписка со status='active'. Просроченную
+# подписку sweeper переводит в expired и тогда же уменьшает счётчики.
+
+
+def amount_to_minor(amount: float) -> int:
+    return int(round(amount * 100))
+
+
+def _add_revenue(column, currency: str, amount_minor: int):
+    current = func.coalesce(column[currency].astext.cast(BigInteger), 0)
+    return column.op("||")(
+        func.jsonb_build_object(
+            cast(literal(currency), String), cast(current + amount_minor, BigInteger)
+        )
+    )
+
+
+def _bump(
+    db: Session,
+    model,
+    key: str,
+    key_value: int,
+    revenue: tuple[str, int] | None = None,
+    **deltas: int,
+) -> None:
+    """Атомарный upsert: counter = counter + delta, без read-modify-write."""
+    now = datetime.utcnow()
+    values = {key: key_value, "updated_at": now, **deltas}
+    set_ = {name: getattr(model, name) + delta for name, delta in deltas.items()}
+    set_["updated_at"] = now
+
+    if revenue is not None:
+        currency, amount_minor = revenue
+        values["revenue_minor"] = {currency: amount_minor}
+        set_["revenue_minor"] = _add_revenue(model.revenue_minor, currency, amount_minor)
+
+    db.execute(
+        insert(model).values(**values).on_conflict_do_update(index_elements=[key], set_=set_)
+    )
+
+
+def _lock_end_users(db: Session, end_user_ids) -> None:
+    """
+    Подсчёт уникальных подписчиков смотрит на остальные подписки пользователя,
+    поэтому webhook и sweeper для одного end_user идут строго по очереди.
+    """
+    db.execute(
+        select(EndUser.id)
+        .where(EndUser.id.in_(sorted(end_user_ids)))
+        .order_by(EndUser.id)
+        .with_for_update()
+    )
+
+
+def project_created(db: Session, user_id: int) -> None:
+    _bump(db, CreatorStats, "user_id", user_id, projects=1)
+
+
+def payment_paid(db: Session, payment: Payment, creator_id: int | None = None) -> None:
+    """creator_id можно передать, если вызывающий код его уже знает."""
+    if not payment.project_id:
+        return
+
+    if creator_id is None:
+        creator_id = db.scalar(
+            select(Project.user_id).where(Project.id == payment.project_id)
+        )
+    revenue = (payment.currency.upper(), amount_to_minor(payment.amount))
+
+    # порядок project -> creator везде одинаковый, чтобы не ловить deadlock
+    _bump(db, ProjectStats, "project_id", payment.project_id, revenue, paid_payments=1)
+    if creator_id:
+        _bump(db, CreatorStats, "user_id", creator_id, revenue, paid_payments=1)
+
+
+def subscription_added(
+    db: Session, subscription: Subscription, creator_id: int | None = None
+) -> None:
+    """Вызывать после flush новой подписки (status='active')."""
+    if creator_id is None:
+        creator_id = db.scalar(
+            select(Project.user_id).where(Project.id == subscription.project_id)
+        )
+    _lock_end_users(db, [subscription.end_user_id])
+
+    # на какие ещё проекты этого креатора у пользователя уже есть подписка
+    other_projects = set(
+        db.scalars(
+            select(Subscription.project_id)
+            .join(Project, Subscription.project_id == Project.id)
+            .where(
+                Subscription.end_user_id == subscription.end_user_id,
+                Subscription.status == "active",
+                Subscription.id != subscription.id,
+                Project.user_id == creator_id,
+            )
+        ).all()
+    )
+
+    if subscription.project_id not in other_projects:
+        _bump(db, ProjectStats, "project_id", subscription.project_id, active_subscribers=1)
+        if not other_projects and creator_id:
+            _bump(db, CreatorStats, "user_id", creator_id, active_subscribers=1)
+
+
+def subscriptions_expired(db: Session, pairs: set[tuple[int, int]]) -> None:
+    """
+    pairs = {(end_user_id, project_id)} подписок, только что переведённых
+    в expired. Счётчик уменьшается, только если у пользователя не осталось
+    другой активной подписки на проект (на проекты креатора).
+    """
+    if not pairs:
+        return
+
+    end_user_ids = {u for u, _ in pairs}
+    _lock_end_users(db, end_user_ids)
+
+    remaining = db.execute(
+        select(Subscription.end_user_id, Subscription.project_id, Project.user_id)
+        .join(Project, Subscription.project_id == Project.id)
+        .where(
+            Subscription.end_user_id.in_(end_user_ids),
+            Subscription.status == "active",
+        )
+    ).all()
+    creators = dict(
+        db.execute(
+            select(Project.id, Project.user_id).where(Project.id.in_({p for _, p in pairs}))
+        ).all()
+    )
+
+    still_in_project = {(u, p) for u, p, _ in remaining}
+    still_with_creator = {(u, c) for u, _, c in remaining}
+
+    lost = {(u, p) for u, p in pairs if (u, p) not in still_in_project}
+    project_deltas = Counter(p for _, p in lost)
+    creator_deltas = Counter(
+        c
+        for u, c in {(u, creators.get(p)) for u, p in lost}
+        if c and (u, c) not in still_with_creator
+    )
+
+    for project_id in sorted(project_deltas):
+        _bump(
+            db,
+            ProjectStats,
+            "project_id",
+            project_id,
+            active_subscribers=-project_deltas[project_id],
+        )
+    for user_id in sorted(creator_deltas):
+        _bump(db, CreatorStats, "user_id", user_id, active_subscribers=-creator_deltas[user_id])
+
+
+# ================================================================
+#   ПОЛНЫЙ ПЕРЕСЧЁТ (python -m app.services.creator_stats)
+# ================================================================
+
+def _revenue_by(owner_column, *joins):
+    paid = select(
+        owner_column.label("owner_id"),
+        func.upper(Payment.currency).label("currency"),
+        func.count().label("payments"),
+        func.sum(func.round(Payment.amount * 100)).label("minor"),
+    )
+    for target, onclause in joins:
+        paid = paid.join(target, onclause)
+    paid = (
+        # платёж без тарифа ничего не исполнил и в счётчики не попал
+        paid.where(
+            Payment.status == "paid",
+            Payment.project_id.is_not(None),
+            Payment.plan_id.is_not(None),
+        )
+        .group_by(owner_column, func.upper(Payment.currency))
+        .subquery()
+    )
+    return (
+        select(
+            paid.c.owner_id,
+            cast(func.sum(paid.c.payments), Integer).label("payments"),
+            func.jsonb_object_agg(paid.c.currency, cast(paid.c.minor, BigInteger)).label(
+                "revenue"
+            ),
+        )
+        .group_by(paid.c.owner_id)
+        .subquery()
+    )
+
+
+def _subscribers_by(owner_column, *joins):
+    query = select(
+        owner_column.label("owner_id"),
+        func.count(func.distinct(Subscription.end_user_id)).label("subscribers"),
+    )
+    for target, onclause in joins:
+        query = query.join(target, onclause)
+    return (
+        query.where(Subscription.status == "active").group_by(owner_column).subquery()
+    )
+
+
+def _snapshot(db: Session, model, key: str) -> dict:
+    return {
+        getattr(row, key): (
+            row.active_subscribers,
+            row.paid_payments,
+            row.revenue_minor,
+            getattr(row, "projects", None),
+        )
+        for row in db.scalars(select(model))
+    }
+
+
+def rebuild_stats(db: Session) -> dict:
+    """
+    Пересчитывает обе таблицы из payments/subscriptions/projects в одной
+    транзакции и возвращает, у кого счётчики разошлись с пересчитанными.
+    Писатели на время пересчёта ждут на блокировке таблиц.
+    """
+    db.execute(text("LOCK TABLE project_stats, creator_stats IN EXCLUSIVE MODE"))
+    before = {
+        "projects": _snapshot(db, ProjectStats, "project_id"),
+        "creators": _snapshot(db, CreatorStats, "user_id"),
+    }
+    now = datetime.utcnow()
+    # пустой объект, а не JSON-строка "{}": иначе || склеит их в массив
+    empty = func.jsonb_build_object()
+
+    revenue = _revenue_by(Payment.project_id)
+    subscribers = _subscribers_by(Subscription.project_id)
+    db.execute(delete(ProjectStats))
+    db.execute(
+        insert(ProjectStats).from_select(
+            ["project_id", "active_subscribers", "paid_payments", "revenue_minor", "updated_at"],
+            select(
+                Project.id,
+                func.coalesce(subscribers.c.subscribers, 0),
+                func.coalesce(revenue.c.payments, 0),
+                func.coalesce(revenue.c.revenue, empty),
+                literal(now),
+            )
+            .outerjoin(subscribers, subscribers.c.owner_id == Project.id)
+            .outerjoin(revenue, revenue.c.owner_id == Project.id),
+        )
+    )
+
+    by_project = (Project, Payment.project_id == Project.id)
+    revenue = _revenue_by(Project.user_id, by_project)
+    subscribers = _subscribers_by(
+        Project.user_id, (Project, Subscription.project_id == Project.id)
+    )
+    projects = (
+        select(Project.user_id.label("owner_id"), func.count(Project.id).label("projects"))
+        .group_by(Project.user_id)
+        .subquery()
+    )
+    db.execute(delete(CreatorStats))
+    db.execute(
+        insert(CreatorStats).from_select(
+            [
+                "user_id",
+                "projects",
+                "active_subscribers",
+                "paid_payments",
+                "revenue_minor",
+                "updated_at",
+            ],
+            select(
+                projects.c.owner_id,
+                projects.c.projects,
+                func.coalesce(subscribers.c.subscribers, 0),
+                func.coalesce(revenue.c.payments, 0),
+                func.coalesce(revenue.c.revenue, empty),
+                literal(now),
+            )
+            .outerjoin(subscribers, subscribers.c.owner_id == projects.c.owner_id)
+            .outerjoin(revenue, revenue.c.owner_id == projects.c.owner_id),
+        )
+    )
+
+    after = {
+        "projects": _snapshot(db, ProjectStats, "project_id"),
+        "creators": _snapshot(db, CreatorStats, "user_id"),
+    }
+    report = {}
+    for kind in ("projects", "creators"):
+        report[kind] = len(after[kind])
+        report[f"drifted_{kind}"] = sorted(
+            key
+            for key in before[kind].keys() | after[kind].keys()
+            if before[kind].get(key) != after[kind].get(key)
+        )
+    return report
+
+
+if __name__ == "__main__":
+    with SessionLocal() as db:
+        report = rebuild_stats(db)
+        db.commit()
+    print(report)
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from sqlalchemy import select, tuple_, update
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.end_user import EndUser
+from app.models.project import Project
+from app.models.subscription import Subscription
+from app.services import creator_stats, subscription_cache, telegram_outbox
+from app.services.workers import PollingWorkerPool
+
+
+@dataclass
+class SweepReport:
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    expired: int = 0
+    revoked: int = 0
+    chunks: int = 0
+    duration_ms: int = 0
+
+
+last_report: SweepReport | None = None
+
+
+async def expire_chunk(now: datetime, limit: int) -> tuple[int, int]:
+    """
+    Одна порция: переводит до `limit` просроченных подписок в "expired"
+    и ставит в outbox удаление этих пользователей из каналов.
+    Возвращает (expired, revoked).
+    """
+    async with AsyncSessionLocal() as db:
+        # range scan по ix_subscriptions_status_end_at; SKIP LOCKED -> можно
+        # запускать sweeper в нескольких процессах
+        due = (
+            select(Subscription.id)
+            .where(Subscription.status == "active", Subscription.end_at <= now)
+            .order_by(Subscription.end_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        expired = (
+            await db.execute(
+                update(Subscription)
+                .where(Subscription.id.in_(due.scalar_subquery()))
+                .values(status="expired")
+                .returning(Subscription.end_user_id, Subscription.project_id)
+            )
+        ).all()
+
+        if not expired:
+            return 0, 0
+
+        pairs = {(r.end_user_id, r.project_id) for r in expired}
+
+        # у кого есть другая действующая подписка на тот же проект — не трогаем
+        still_active = set(
+            (
+                await db.execute(
+                    select(Subscription.end_user_id, Subscription.project_id).where(
+                        tuple_(Subscription.end_user_id, Subscription.project_id).in_(pairs),
+                        Subscription.status == "active",
+                        Subscription.end_at > now,
+                    )
+                )
+            ).all()
+        )
+        to_revoke = pairs - still_active
+
+        telegram_ids = dict(
+            (
+                await db.execute(
+                    select(EndUser.id, EndUser.telegram_id).where(
+                        EndUser.id.in_({u for u, _ in pairs})
+                    )
+                )
+            ).all()
+        )
+
+        revoked = 0
+        if to_revoke:
+            channel_ids = dict(
+                (
+                    await db.execute(
+                        select(Project.id, Project.telegram_channel_id).where(
+                            Project.id.in_({p for _, p in to_revoke}),
+                            Project.telegram_channel_id.is_not(None),
+                        )
+                    )
+                ).all()
+            )
+
+            for end_user_id, project_id in to_revoke:
+                telegram_id = telegram_ids.get(end_user_id)
+                channel_id = channel_ids.get(project_id)
+                if not telegram_id or not channel_id:
+                    continue
+
+                telegram_outbox.enqueue(
+                    db,
+                    "revokeAccess",
+                    channel_id,
+                    {"chat_id": channel_id, "user_id": telegram_id},
+                )
+                revoked += 1
+
+        await db.run_sync(creator_stats.subscriptions_expired, pairs)
+        await db.commit()
+
+    for end_user_id, project_id in pairs:
+        if end_user_id in telegram_ids:
+            subscription_cache.invalidate(telegram_ids[end_user_id], project_id)
+
+    if revoked:
+        telegram_outbox.worker_pool.wakeup()
+
+    return len(expired), revoked
+
+
+async def sweep_expired_subscriptions() -> SweepReport:
+    """
+    Проходит по всем просроченным подпискам порциями по
+    SUBSCRIPTION_SWEEP_BATCH_SIZE — в памяти никогда не больше одной порции.
+    """
+    global last_report
+
+    report = SweepReport()
+    started = time.perf_counter()
+    now = datetime.utcnow()
+
+    while True:
+        expired, revoked = await expire_chunk(now, settings.SUBSCRIPTION_SWEEP_BATCH_SIZE)
+        if not expired:
+            break
+        report.expired += expired
+        report.revoked += revoked
+        report.chunks += 1
+
+    report.duration_ms = int((time.perf_counter() - started) * 1000)
+    last_report = report
+
+    if report.expired:
+        print(
+            f"[SWEEPER] expired {report.expired} subscriptions, "
+            f"revoked {report.revoked} channel members "
+            f"in {report.chunks} chunks, {report.duration_ms} ms"
+        )
+    return report
+
+
+def get_last_report() -> dict | None:
+    return asdict(last_report) if last_report else None
+
+
+async def _run_sweep() -> int:
+    await sweep_expired_subscriptions()
+    # полный проход уже сделан -> ждём следующего интервала
+    return 0
+
+
+worker_pool = PollingWorkerPool(
+    name="SWEEPER",
+    size=1,
+    run_once=_run_sweep,
+    poll_interval=settings.SUBSCRIPTION_SWEEP_INTERVAL,
+)
+
+
+if __name__ == "__main__":
+    print(asdict(asyncio.run(sweep_expired_subscriptions())))
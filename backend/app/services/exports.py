@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Callable
+
+from sqlalchemy import Select, exists, select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.end_user import EndUser
+from app.models.payment import Payment
+from app.models.subscription import Subscription
+
+
+def _subscriptions(project_id: int) -> Select:
+    return (
+        select(
+            Subscription.id,
+            EndUser.telegram_id,
+            Subscription.plan_id,
+            Subscription.start_at,
+            Subscription.end_at,
+            Subscription.status,
+            Subscription.auto_renew,
+        )
+        .join(EndUser, Subscription.end_user_id == EndUser.id)
+        .where(Subscription.project_id == project_id)
+        .order_by(Subscription.id)
+    )
+
+
+def _end_users(project_id: int) -> Select:
+    # все, у кого когда-либо была подписка на проект
+    return (
+        select(EndUser.id, EndUser.telegram_id, EndUser.language, EndUser.created_at)
+        .where(
+            exists().where(
+                Subscription.end_user_id == EndUser.id,
+                Subscription.project_id == project_id,
+            )
+        )
+        .order_by(EndUser.id)
+    )
+
+
+def _payments(project_id: int) -> Select:
+    return (
+        select(
+            Payment.id,
+            Payment.telegram_id,
+            Payment.plan_id,
+            Payment.amount,
+            Payment.currency,
+            Payment.status,
+            Payment.stripe_session_id,
+            Payment.created_at,
+            Payment.updated_at,
+        )
+        .where(Payment.project_id == project_id)
+        .order_by(Payment.id)
+    )
+
+
+EXPORTS: dict[str, Callable[[int], Select]] = {
+    "subscriptions": _subscriptions,
+    "end_users": _end_users,
+    "payments": _payments,
+}
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _encode_csv(rows) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows([_plain(v) for v in row] for row in rows)
+    return buf.getvalue().encode()
+
+
+def _encode_ndjson(columns: list[str], rows) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+
+async def export_rows(
+    table: str, project_id: int, fmt: str = "csv", compress: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Отдаёт экспорт порциями байт. Строки читаются server-side курсором
+    по EXPORT_BATCH_SIZE, поэтому память не зависит от размера таблицы,
+    а первые байты уходят клиенту сразу.
+    """
+    stmt = EXPORTS[table](project_id)
+    columns = list(stmt.selected_columns.keys())
+    gz = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+
+    def out(data: bytes) -> bytes:
+        return gz.compress(data) if gz else data
+
+    if fmt == "csv":
+        yield out(_encode_csv([columns]))
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            chunk = out(_encode_csv(rows) if fmt == "csv" else _encode_ndjson(columns, rows))
+            if chunk:
+                yield chunk
+
+    if gz:
+        yield gz.flush()
@@ -0,0 +1,235 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.end_user import EndUser
+from app.models.payment import Payment
+from app.models.plan import SubscriptionPlan
+from app.models.project import Project
+from app.models.subscription import Subscription
+from app.services import creator_stats, ledger
+from app.services.telegram_outbox import enqueue_message
+
+# Комиссия платформы 10% → 90% креатору
+PLATFORM_FEE_PCT = Decimal("0.10")
+
+
+@dataclass
+class FulfilmentResult:
+    telegram_id: int
+    project_id: int
+    notified: bool
+
+
+async def fulfil_checkout_session(
+    db: AsyncSession, session_obj: dict
+) -> FulfilmentResult | None:
+    """
+    Обработка checkout.session.completed: платёж → подписка → баланс креатора
+    → подтверждение пользователю (через outbox).
+
+    Ничего не коммитит: вызывающий код фиксирует транзакцию вместе
+    с отметкой о том, что событие обработано.
+    Возвращает FulfilmentResult, если создана подписка, иначе None.
+
+    Всё — upsert'ами и атомарными UPDATE, без read-modify-write в Python,
+    поэтому параллельные вебхуки одного креатора не теряют начисления.
+    """
+    session_id = session_obj["id"]
+    metadata = session_obj.get("metadata", {})
+
+    # --- 1. ПЛАТЁЖ → paid (одним upsert'ом) ---
+    # Платёж должны были создать ДО оплаты — если нет, создаётся аварийно
+    # из metadata. Уже "paid" (вебхук повторился) — RETURNING пустой.
+    payment: Payment | None = await db.scalar(
+        insert(Payment)
+        .values(
+            telegram_id=int(metadata.get("telegram_id", 0)),
+            plan_id=int(metadata.get("plan_id", 0)) or None,
+            project_id=int(metadata.get("project_id", 0)) or None,
+            stripe_session_id=session_id,
+            amount=session_obj["amount_total"] / 100.0,
+            currency=session_obj["currency"].upper(),
+            status="paid",
+        )
+        .on_conflict_do_update(
+            index_elements=[Payment.stripe_session_id],
+            set_={"status": "paid", "updated_at": func.now()},
+            where=Payment.status != "paid",
+        )
+        .returning(Payment),
+        execution_options={"populate_existing": True},
+    )
+
+    if payment is None:
+        print(f"[WEBHOOK] ⚠ Payment for session {session_id} already processed, skipping.")
+        return None
+
+    # --- 2. EndUser (upsert; заодно блокирует строку пользователя) ---
+    end_user_id = await db.scalar(
+        insert(EndUser)
+        .values(telegram_id=payment.telegram_id, language="en")
+        .on_conflict_do_update(
+            index_elements=[EndUser.telegram_id],
+            set_={"telegram_id": EndUser.telegram_id},
+        )
+        .returning(EndUser.id)
+    )
+
+    now = datetime.utcnow()
+
+    # --- 3. ПЛАН + ПРОЕКТ + КРЕАТОР + уже активная подписка — одним запросом ---
+    already_active = (
+        select(Subscription.id)
+        .where(
+            Subscription.end_user_id == end_user_id,
+            Subscription.project_id == SubscriptionPlan.project_id,
+            Subscription.plan_id == SubscriptionPlan.id,
+            Subscription.status == "active",
+            Subscription.end_at >= now,
+        )
+        .order_by(Subscription.end_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    plan = (
+        await db.execute(
+            select(
+                SubscriptionPlan.id,
+                SubscriptionPlan.project_id,
+                SubscriptionPlan.duration_days,
+                Project.user_id.label("creator_id"),
+                Project.username.label("channel_username"),
+                already_active.label("existing_sub_id"),
+            )
+            .outerjoin(Project, SubscriptionPlan.project_id == Project.id)
+            .where(SubscriptionPlan.id == payment.plan_id)
+        )
+    ).first()
+
+    if not plan:
+        print(f"[WEBHOOK] ❌ Plan not found for payment {payment.id}")
+        return None
+
+    if payment.project_id != plan.project_id:
+        # платёж относится к проекту тарифа, что бы ни пришло в metadata
+        payment.project_id = plan.project_id
+
+    duration = plan.duration_days or 30
+
+    end_at = None
+    if plan.existing_sub_id:
+        # --- 4a. ПРОДЛЕНИЕ: уже есть активная подписка на этот тариф ---
+        # срок добавляется к текущему end_at, новая строка не создаётся
+        # (если sweeper успел её закрыть — RETURNING пустой, создаём новую)
+        end_at = await db.scalar(
+            update(Subscription)
+            .where(
+                Subscription.id == plan.existing_sub_id,
+                Subscription.status == "active",
+            )
+            .values(
+                end_at=Subscription.end_at + timedelta(days=duration),
+                renewal_reminded_at=None,
+            )
+            .returning(Subscription.end_at)
+        )
+    renewed = end_at is not None
+
+    if renewed:
+        subscription_id = plan.existing_sub_id
+    else:
+        # --- 4b. СОЗДАЁМ ПОДПИСКУ ---
+        end_at = now + timedelta(days=duration)
+
+        subscription = Subscription(
+            end_user_id=end_user_id,
+            project_id=plan.project_id,
+            plan_id=plan.id,
+            start_at=now,
+            end_at=end_at,
+            status="active",
+        )
+        db.add(subscription)
+        await db.flush()
+        await db.run_sync(creator_stats.subscription_added, subscription, plan.creator_id)
+        subscription_id = subscription.id
+
+    result = FulfilmentResult(
+        telegram_id=payment.telegram_id,
+        project_id=plan.project_id,
+        notified=False,
+    )
+
+    # --- 5. НАЧИСЛЯЕМ ДЕНЬГИ АВТОРУ ПРОЕКТА (записи в ledger) ---
+    if plan.creator_id is None:
+        print(f"[WEBHOOK] ❌ Project not found for plan {plan.id}")
+        return result
+
+    # счётчики дашборда — тому же креатору и проекту, что и начисление
+    await db.run_sync(creator_stats.payment_paid, payment, plan.creator_id)
+
+    gross_amount = Decimal(str(payment.amount))  # например 9.99
+    creator_amount = gross_amount * (Decimal("1.0") - PLATFORM_FEE_PCT)
+
+    # в центы
+    gross_cents = int(gross_amount * 100)
+    creator_cents = int(creator_amount * 100)
+
+    await db.run_sync(
+        ledger.credit_payment,
+        plan.creator_id,
+        payment.id,
+        gross_cents,
+        gross_cents - creator_cents,
+    )
+
+    print(
+        f"[WEBHOOK] ✅ Subscription {subscription_id} "
+        f"{'extended' if renewed else 'created'} for user {payment.telegram_id}; "
+        f"credited {creator_amount} to creator {plan.creator_id}."
+    )
+
+    if not payment.telegram_id:
+        return result
+
+    # --- 6. ПОДТВЕРЖДЕНИЕ В TELEGRAM (уйдёт после коммита) ---
+    enqueue_message(
+        db,
+        payment.telegram_id,
+        payment_confirmation_text(plan.channel_username, end_at if renewed else None),
+    )
+    result.notified = True
+    return result
+
+
+def payment_confirmation_text(
+    channel_username: str | None, renewed_until: datetime | None = None
+) -> str:
+    # пытаемся собрать ссылку на канал по username проекта
+    channel_url = None
+    if channel_username:
+        username_clean = channel_username.lstrip("@")
+        channel_url = f"https://t.me/{username_clean}"
+
+    if renewed_until:
+        return (
+            "✅ Payment received! Your subscription is extended until "
+            f"{renewed_until:%Y-%m-%d %H:%M} UTC."
+        )
+
+    text_lines = ["✅ Payment received! Your subscription is now active."]
+
+    if channel_url:
+        text_lines.append(f"Here is your channel link:\n{channel_url}")
+    else:
+        text_lines.append(
+            "You now have access to the channel. "
+            "If you don't see the invite, please contact the creator."
+        )
+
+    return "\n\n".join(text_lines)
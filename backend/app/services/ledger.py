@@ -0,0 +1,212 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import BigInteger, func, insert, literal, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.models.ledger import BalanceSnapshot, LedgerEntry
+from app.services.workers import PollingWorkerPool
+
+# Баланс креатора = сумма его записей в balance_ledger. Запись только
+# добавляется (INSERT), общей "горячей" строки баланса нет, поэтому
+# параллельные платежи одного креатора друг друга не ждут.
+#
+# Чтобы чтение не суммировало всю историю, rollup периодически сворачивает
+# записи в balance_snapshots. Граница свёртки — txid: записи транзакций с
+# txid < pg_snapshot_xmin(...) уже точно закоммичены, и ни одна из них
+# не "появится" позже (id из sequence такой гарантии не даёт).
+#
+# Функции синхронные и ничего не коммитят, как и creator_stats.
+# Из async-кода: await db.run_sync(ledger.credit_payment, ...)
+
+PAYMENT_CREDIT = "payment_credit"
+PLATFORM_FEE = "platform_fee"
+PAYOUT_DEBIT = "payout_debit"
+ADJUSTMENT = "adjustment"
+
+ENTRY_TYPES = (PAYMENT_CREDIT, PLATFORM_FEE, PAYOUT_DEBIT, ADJUSTMENT)
+
+
+def credit_payment(
+    db: Session, user_id: int, payment_id: int, gross_cents: int, fee_cents: int
+) -> None:
+    """Оплата: +gross и −комиссия платформы, одним INSERT."""
+    now = datetime.utcnow()
+    db.execute(
+        insert(LedgerEntry),
+        [
+            {
+                "user_id": user_id,
+                "entry_type": PAYMENT_CREDIT,
+                "amount_cents": gross_cents,
+                "payment_id": payment_id,
+                "created_at": now,
+            },
+            {
+                "user_id": user_id,
+                "entry_type": PLATFORM_FEE,
+                "amount_cents": -fee_cents,
+                "payment_id": payment_id,
+                "created_at": now,
+            },
+        ],
+    )
+
+
+def debit_payout(db: Session, user_id: int, payout_id: int, amount_cents: int) -> None:
+    db.add(
+        LedgerEntry(
+            user_id=user_id,
+            entry_type=PAYOUT_DEBIT,
+            amount_cents=-amount_cents,
+            payout_id=payout_id,
+        )
+    )
+    db.flush()
+
+
+def add_adjustment(
+    db: Session,
+    user_id: int,
+    amount_cents: int,
+    note: str,
+    payout_id: int | None = None,
+) -> None:
+    """Ручная корректировка или возврат отклонённой выплаты."""
+    db.add(
+        LedgerEntry(
+            user_id=user_id,
+            entry_type=ADJUSTMENT,
+            amount_cents=amount_cents,
+            payout_id=payout_id,
+            note=note,
+        )
+    )
+    db.flush()
+
+
+def balance_cents_expr(user_id):
+    """
+    Баланс как SQL-выражение: снимок + записи после его горизонта.
+    Индексный lookup по ix_balance_ledger_user_txid; записей после горизонта
+    не больше, чем накопилось с последнего rollup.
+    """
+    base = (
+        select(BalanceSnapshot.balance_cents)
+        .where(BalanceSnapshot.user_id == user_id)
+        .scalar_subquery()
+    )
+    # горизонт — через join, а не вложенным подзапросом: иначе user_id
+    # из внешнего запроса (verify_snapshots) не коррелирует на два уровня
+    recent = (
+        select(func.sum(LedgerEntry.amount_cents))
+        .select_from(LedgerEntry)
+        .outerjoin(BalanceSnapshot, BalanceSnapshot.user_id == LedgerEntry.user_id)
+        .where(
+            LedgerEntry.user_id == user_id,
+            LedgerEntry.txid >= func.coalesce(BalanceSnapshot.horizon_txid, 0),
+        )
+        .scalar_subquery()
+    )
+    return (func.coalesce(base, 0) + func.coalesce(recent, 0)).cast(BigInteger)
+
+
+def get_balance_cents(db: Session, user_id: int) -> int:
+    return db.scalar(select(balance_cents_expr(literal(user_id))))
+
+
+def lock_balance(db: Session, user_id: int) -> None:
+    """
+    Сериализует только списания одного креатора (выплаты), чтобы две заявки
+    не потратили один и тот же баланс. Начисления эту блокировку не берут.
+    """
+    db.execute(
+        select(func.pg_advisory_xact_lock(func.hashtextextended(f"balance:{user_id}", 0)))
+    )
+
+
+# ================================================================
+#   ROLLUP
+# ================================================================
+ROLLUP_SQL = text(
+    """
+WITH horizon AS (
+    SELECT (pg_snapshot_xmin(pg_current_snapshot())::text)::bigint AS txid
+), previous AS (
+    -- всё, что раньше горизонта прошлого rollup, уже свёрнуто
+    SELECT coalesce(max(horizon_txid), 0) AS txid FROM balance_snapshots
+), deltas AS (
+    SELECT l.user_id, sum(l.amount_cents) AS delta
+    FROM balance_ledger l
+    LEFT JOIN balance_snapshots s ON s.user_id = l.user_id
+    CROSS JOIN horizon h
+    CROSS JOIN previous p
+    WHERE l.txid >= p.txid
+      AND l.txid >= coalesce(s.horizon_txid, 0)
+      AND l.txid < h.txid
+    GROUP BY l.user_id
+)
+INSERT INTO balance_snapshots (user_id, balance_cents, horizon_txid, updated_at)
+SELECT d.user_id, d.delta, h.txid, now() AT TIME ZONE 'utc'
+FROM deltas d CROSS JOIN horizon h
+ON CONFLICT (user_id) DO UPDATE
+SET balance_cents = balance_snapshots.balance_cents + excluded.balance_cents,
+    horizon_txid = excluded.horizon_txid,
+    updated_at = excluded.updated_at
+"""
+)
+
+
+async def rollup_balances() -> int:
+    """
+    Сворачивает новые записи ledger в снимки. Одним запросом (один снимок
+    данных); параллельный rollup из другого процесса просто пропускается.
+    Возвращает число обновлённых снимков.
+    """
+    async with AsyncSessionLocal() as db:
+        locked = await db.scalar(
+            select(func.pg_try_advisory_xact_lock(func.hashtextextended("ledger:rollup", 0)))
+        )
+        if not locked:
+            return 0
+        result = await db.execute(ROLLUP_SQL)
+        await db.commit()
+
+    if result.rowcount:
+        print(f"[LEDGER] rolled up balances of {result.rowcount} creators")
+    return result.rowcount
+
+
+async def _run_rollup() -> int:
+    await rollup_balances()
+    # один проход за интервал
+    return 0
+
+
+worker_pool = PollingWorkerPool(
+    name="LEDGER",
+    size=1,
+    run_once=_run_rollup,
+    poll_interval=settings.LEDGER_ROLLUP_INTERVAL,
+)
+
+
+def verify_snapshots(db: Session) -> list[int]:
+    """user_id, у которых баланс по снимку расходится с полной суммой ledger."""
+    full = (
+        select(LedgerEntry.user_id, func.sum(LedgerEntry.amount_cents).label("total"))
+        .group_by(LedgerEntry.user_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(full.c.user_id, full.c.total, balance_cents_expr(full.c.user_id))
+    ).all()
+    return [user_id for user_id, total, balance in rows if total != balance]
+
+
+if __name__ == "__main__":
+    asyncio.run(rollup_balances())
+    with SessionLocal() as session:
+        print({"drifted_users": verify_snapshots(session)})
@@ -0,0 +1,313 @@
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.payout import PayoutRequest
+from app.services import ledger
+from app.services.workers import PollingWorkerPool
+
+# сколько воркер "держит" выплату; если он упадёт, её заберёт другой
+LEASE_SECONDS = 120
+
+
+# ================================================================
+#   PAYOUT BACKENDS
+# ================================================================
+class PayoutError(Exception):
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class FakePayoutBackend:
+    """
+    In-memory stand-in for a payout provider, for tests only: it sends no
+    money. Can wait a bit, fail at random and remembers every transfer by
+    idempotency key. Tests install it with `payouts.backend = ...`.
+    """
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.transfers: dict[str, dict] = {}
+
+    async def send(
+        self,
+        idempotency_key: str,
+        amount_cents: int,
+        method: str | None,
+        details: str | None,
+    ) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if idempotency_key in self.transfers:
+            return self.transfers[idempotency_key]["reference"]
+        if not method or not details:
+            raise PayoutError("Payout method and details are not set", retryable=False)
+        if random.random() < self.failure_rate:
+            raise PayoutError("fake provider: temporary failure")
+
+        reference = f"fake_{uuid.uuid4().hex[:16]}"
+        self.transfers[idempotency_key] = {
+            "reference": reference,
+            "amount_cents": amount_cents,
+            "method": method,
+        }
+        return reference
+
+
+def create_backend():
+    """
+    Провайдер выплат по PAYOUT_BACKEND. Пока реальных провайдеров нет,
+    по умолчанию — None: воркеры не запускаются, заявки остаются pending.
+    """
+    if not settings.PAYOUT_BACKEND:
+        return None
+    raise ValueError(f"Unknown PAYOUT_BACKEND: {settings.PAYOUT_BACKEND!r}")
+
+
+backend = create_backend()
+
+
+# ================================================================
+#   METRICS (per process)
+# ================================================================
+@dataclass
+class PayoutMetrics:
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    batches: int = 0
+    claimed: int = 0
+    paid: int = 0
+    paid_cents: int = 0
+    retried: int = 0
+    failed: int = 0
+    send_ms_total: int = 0  # суммарное время отправки пачек
+    last_batch_at: datetime | None = None
+    last_batch_ms: int | None = None
+
+
+metrics = PayoutMetrics()
+
+
+def get_metrics() -> dict:
+    data = asdict(metrics)
+    uptime = (datetime.utcnow() - metrics.started_at).total_seconds()
+    data["paid_per_minute"] = round(metrics.paid / uptime * 60, 2) if uptime else 0.0
+    data["avg_batch_send_ms"] = (
+        round(metrics.send_ms_total / metrics.batches, 1) if metrics.batches else None
+    )
+    return data
+
+
+# ================================================================
+#   PROCESSING
+# ================================================================
+async def claim_payouts(limit: int) -> list[PayoutRequest]:
+    """
+    Забирает пачку выплат: pending, у которых подошло время, и processing
+    с истёкшим lease. FOR UPDATE SKIP LOCKED -> воркеры (и процессы)
+    никогда не получат одну выплату одновременно.
+    """
+    now = datetime.utcnow()
+
+    async with AsyncSessionLocal() as db:
+        ready = (
+            select(PayoutRequest.id)
+            .where(
+                or_(
+                    and_(
+                        PayoutRequest.status == "pending",
+                        PayoutRequest.next_attempt_at <= now,
+                    ),
+                    and_(
+                        PayoutRequest.status == "processing",
+                        PayoutRequest.locked_until < now,
+                    ),
+                )
+            )
+            .order_by(PayoutRequest.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        payouts = (
+            await db.scalars(
+                update(PayoutRequest)
+                .where(PayoutRequest.id.in_(ready.scalar_subquery()))
+                .values(
+                    status="processing",
+                    attempts=PayoutRequest.attempts + 1,
+                    locked_until=now + timedelta(seconds=LEASE_SECONDS),
+                )
+                .returning(PayoutRequest)
+            )
+        ).all()
+        await db.commit()
+
+    return list(payouts)
+
+
+async def _send(payout: PayoutRequest) -> str | PayoutError:
+    try:
+        # ключ один на выплату: повтор после падения воркера не заплатит дважды
+        return await backend.send(
+            f"payout-{payout.id}",
+            payout.amount_cents,
+            payout.payout_method,
+            payout.payout_details,
+        )
+    except PayoutError as e:
+        return e
+    except Exception as e:
+        return PayoutError(repr(e))
+
+
+async def process_batch() -> int:
+    if backend is None:
+        # без провайдера ничего не забираем: заявка не должна стать "paid"
+        return 0
+
+    payouts = await claim_payouts(settings.PAYOUT_BATCH_SIZE)
+    if not payouts:
+        return 0
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(_send(p) for p in payouts))
+    send_ms = int((time.perf_counter() - started) * 1000)
+    now = datetime.utcnow()
+
+    # все итоги пачки — одной транзакцией
+    async with AsyncSessionLocal() as db:
+        for payout, outcome in zip(payouts, outcomes):
+            # только если выплату за это время не забрал другой воркер
+            mine = and_(
+                PayoutRequest.id == payout.id,
+                PayoutRequest.status == "processing",
+                PayoutRequest.attempts == payout.attempts,
+            )
+
+            if isinstance(outcome, str):
+                await db.execute(
+                    update(PayoutRequest)
+                    .where(mine)
+                    .values(
+                        status="paid",
+                        processed_at=now,
+                        external_reference=outcome,
+                        locked_until=None,
+                        last_error=None,
+                    )
+                )
+                metrics.paid += 1
+                metrics.paid_cents += payout.amount_cents
+                continue
+
+            final = (
+                not outcome.retryable
+                or payout.attempts >= settings.PAYOUT_MAX_ATTEMPTS
+            )
+            if not final:
+                # экспоненциальный backoff: 2, 4, 8 ... секунд, но не больше 10 минут
+                delay = min(2 ** payout.attempts, 600)
+                await db.execute(
+                    update(PayoutRequest)
+                    .where(mine)
+                    .values(
+                        status="pending",
+                        next_attempt_at=now + timedelta(seconds=delay),
+                        locked_until=None,
+                        last_error=str(outcome)[:2000],
+                    )
+                )
+                metrics.retried += 1
+                continue
+
+            result = await db.execute(
+                update(PayoutRequest)
+                .where(mine)
+                .values(
+                    status="failed",
+                    processed_at=now,
+                    locked_until=None,
+                    last_error=str(outcome)[:2000],
+                )
+            )
+            if result.rowcount:
+                # деньги возвращаются на баланс креатора
+                await db.run_sync(
+                    ledger.add_adjustment,
+                    payout.user_id,
+                    payout.amount_cents,
+                    f"payout {payout.id} failed: refund",
+                    payout.id,
+                )
+                metrics.failed += 1
+                print(f"[PAYOUTS] ❌ Payout {payout.id} failed: {outcome}")
+
+        await db.commit()
+
+    metrics.batches += 1
+    metrics.claimed += len(payouts)
+    metrics.send_ms_total += send_ms
+    metrics.last_batch_at = now
+    metrics.last_batch_ms = int((time.perf_counter() - started) * 1000)
+    return len(payouts)
+
+
+async def queue_stats() -> dict:
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(PayoutRequest.status, func.count(), func.sum(PayoutRequest.amount_cents))
+            .group_by(PayoutRequest.status)
+        )
+        return {
+            status: {"count": count, "amount": (amount or 0) / 100}
+            for status, count, amount in rows
+        }
+
+
+async def recent_stats(minutes: int = 60) -> dict:
+    """
+    Итоги за последние `minutes` по таблице payout_requests — общие для
+    всех процессов, в отличие от `metrics`.
+    """
+    since = datetime.utcnow() - timedelta(minutes=minutes)
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(PayoutRequest.status, func.count(), func.sum(PayoutRequest.amount_cents))
+            .where(
+                PayoutRequest.status.in_(("paid", "failed")),
+                PayoutRequest.processed_at >= since,
+            )
+            .group_by(PayoutRequest.status)
+        )
+        done = {status: (count, amount or 0) for status, count, amount in rows}
+        retrying = await db.scalar(
+            select(func.count()).where(
+                PayoutRequest.status == "pending", PayoutRequest.attempts > 0
+            )
+        )
+
+    paid, paid_cents = done.get("paid", (0, 0))
+    return {
+        "window_minutes": minutes,
+        "paid": paid,
+        "paid_amount": paid_cents / 100,
+        "paid_per_minute": round(paid / minutes, 2),
+        "failed": done.get("failed", (0, 0))[0],
+        "retrying": retrying,
+    }
+
+
+worker_pool = PollingWorkerPool(
+    name="PAYOUTS",
+    size=settings.PAYOUT_WORKERS,
+    run_once=process_batch,
+    poll_interval=settings.PAYOUT_POLL_INTERVAL,
+)
@@ -0,0 +1,71 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.core.http_cache import CachedJSON
+from app.models.plan import SubscriptionPlan
+from app.schemas.plan import PlanRead
+
+# project_id -> CachedJSON со списком активных тарифов
+project_plans = TTLCache(
+    "project_plans", ttl=settings.PLAN_CACHE_TTL, max_size=settings.PLAN_CACHE_SIZE
+)
+# plan_id -> CachedJSON | MISSING
+plans = TTLCache("plans", ttl=settings.PLAN_CACHE_TTL, max_size=settings.PLAN_CACHE_SIZE)
+
+# Версия каталога: растёт при каждом изменении тарифов. Результат запроса
+# кладётся в кэш, только если версия не поменялась, пока мы ходили в БД, —
+# иначе параллельный читатель мог бы вернуть в кэш уже устаревшие данные.
+_version = 0
+
+
+def _dump(plan: SubscriptionPlan) -> dict:
+    return PlanRead.model_validate(plan).model_dump(mode="json")
+
+
+async def get_project_plans(db: AsyncSession, project_id: int) -> CachedJSON:
+    """Активные тарифы проекта: из кэша, при промахе — один запрос без join."""
+    cached = project_plans.get(project_id)
+    if cached is not None:
+        return cached
+
+    version = _version
+    result = await db.scalars(
+        select(SubscriptionPlan)
+        .where(
+            SubscriptionPlan.project_id == project_id,
+            SubscriptionPlan.active == True,  # noqa: E712
+        )
+        .order_by(SubscriptionPlan.id)
+    )
+    catalog = CachedJSON.build([_dump(p) for p in result.all()])
+
+    if version == _version:
+        project_plans.set(project_id, catalog)
+    return catalog
+
+
+async def get_plan(db: AsyncSession, plan_id: int) -> CachedJSON | None:
+    cached = plans.get(plan_id)
+    if cached is MISSING:
+        return None
+    if cached is not None:
+        return cached
+
+    version = _version
+    plan = await db.get(SubscriptionPlan, plan_id)
+    entry = CachedJSON.build(_dump(plan)) if plan else MISSING
+
+    if version == _version:
+        plans.set(plan_id, entry)
+    return None if entry is MISSING else entry
+
+
+def invalidate(project_id: int, plan_id: int | None = None) -> None:
+    """Вызывать после commit любого изменения тарифов проекта."""
+    global _version
+    _version += 1
+    project_plans.delete(project_id)
+    if plan_id is not None:
+        plans.delete(plan_id)
@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import hmac
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.end_user import EndUser
+from app.models.plan import SubscriptionPlan
+from app.models.project import Project
+from app.models.subscription import Subscription
+from app.services import telegram_outbox
+from app.services.workers import PollingWorkerPool
+
+
+@dataclass
+class RenewalReport:
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    reminded: int = 0
+    buckets: int = 0
+    chunks: int = 0
+    duration_ms: int = 0
+
+
+last_report: RenewalReport | None = None
+
+
+# ================================================================
+#   ССЫЛКА НА ПРОДЛЕНИЕ
+# ================================================================
+def renewal_signature(subscription_id: int) -> str:
+    return hmac.new(
+        settings.SECRET_KEY.encode(), f"renew:{subscription_id}".encode(), hashlib.sha256
+    ).hexdigest()[:32]
+
+
+def links_configured() -> bool:
+    """
+    Telegram принимает в inline-кнопке только абсолютный URL: без
+    BACKEND_PUBLIC_URL каждое напоминание падало бы в outbox раз за разом.
+    """
+    url = urlsplit(settings.BACKEND_PUBLIC_URL)
+    return url.scheme == "https" and bool(url.netloc)
+
+
+def renewal_link(subscription_id: int) -> str:
+    """
+    Готовая ссылка для сообщения: GET на неё создаёт (или переиспользует)
+    Checkout Session по тарифу подписки и редиректит в Stripe.
+    """
+    return (
+        f"{settings.BACKEND_PUBLIC_URL.rstrip('/')}/api/v1/payments/renew/{subscription_id}"
+        f"?sig={renewal_signature(subscription_id)}"
+    )
+
+
+def reminder_text(project_title: str | None, plan_name: str, end_at: datetime) -> str:
+    channel = f"«{project_title}»" if project_title else "the channel"
+    return (
+        f"⏰ Your subscription to {channel} ({plan_name}) ends on "
+        f"{end_at:%Y-%m-%d %H:%M} UTC.\n\n"
+        "Renew now to keep your access — the remaining days are kept."
+    )
+
+
+# ================================================================
+#   НАПОМИНАНИЯ
+# ================================================================
+async def remind_chunk(window_start: datetime, window_end: datetime, limit: int) -> int:
+    """
+    Одна порция: до `limit` подписок с end_at в [window_start, window_end),
+    которым ещё не напоминали. Отметка и сообщения в outbox — одной
+    транзакцией, так что напоминание не уйдёт дважды.
+    """
+    async with AsyncSessionLocal() as db:
+        # range scan по частичному ix_subscriptions_renewal_due;
+        # SKIP LOCKED -> можно запускать в нескольких процессах
+        due = (
+            select(Subscription.id)
+            .where(
+                Subscription.status == "active",
+                Subscription.renewal_reminders == True,  # noqa: E712
+                Subscription.renewal_reminded_at.is_(None),
+                Subscription.end_at >= window_start,
+                Subscription.end_at < window_end,
+            )
+            .order_by(Subscription.end_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        reminded = (
+            await db.execute(
+                update(Subscription)
+                .where(Subscription.id.in_(due.scalar_subquery()))
+                .values(renewal_reminded_at=datetime.utcnow())
+                .returning(Subscription.id)
+            )
+        ).scalars().all()
+
+        if not reminded:
+            return 0
+
+        rows = await db.execute(
+            select(
+                Subscription.id,
+                Subscription.project_id,
+                Subscription.end_at,
+                EndUser.telegram_id,
+                SubscriptionPlan.name.label("plan_name"),
+                SubscriptionPlan.active.label("plan_active"),
+                Project.title.label("project_title"),
+            )
+            .join(EndUser, Subscription.end_user_id == EndUser.id)
+            .join(SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id)
+            .join(Project, Subscription.project_id == Project.id)
+            .where(Subscription.id.in_(reminded))
+        )
+
+        for row in rows:
+            if not row.plan_active:
+                # тариф больше не продаётся — продлевать нечего
+                continue
+            telegram_outbox.enqueue_message(
+                db,
+                row.telegram_id,
+                reminder_text(row.project_title, row.plan_name, row.end_at),
+                reply_markup={
+                    "inline_keyboard": [
+                        [{"text": "🔁 Renew subscription", "url": renewal_link(row.id)}],
+                        # бот отключит напоминания подписанным запросом
+                        [
+                            {
+                                "text": "🔕 Don't remind me",
+                                "callback_data": f"reminders_off:{row.project_id}",
+                            }
+                        ],
+                    ]
+                },
+            )
+
+        await db.commit()
+
+    telegram_outbox.worker_pool.wakeup()
+    return len(reminded)
+
+
+async def send_renewal_reminders() -> RenewalReport:
+    """
+    Напоминает всем, у кого подписка кончается в ближайшие
+    RENEWAL_REMINDER_LEAD_HOURS. Окно режется на интервалы по
+    RENEWAL_BUCKET_MINUTES (сначала самые срочные), каждый — порциями
+    по RENEWAL_BATCH_SIZE: большая волна продлений не превращается
+    в один огромный запрос.
+    """
+    global last_report
+
+    report = RenewalReport()
+    if not links_configured():
+        print("[RENEWALS] ⚠ BACKEND_PUBLIC_URL is not an https URL, skipping reminders")
+        return report
+
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    window_end = now + timedelta(hours=settings.RENEWAL_REMINDER_LEAD_HOURS)
+    bucket = timedelta(minutes=settings.RENEWAL_BUCKET_MINUTES)
+
+    bucket_start = now
+    while bucket_start < window_end:
+        bucket_end = min(bucket_start + bucket, window_end)
+        while True:
+            reminded = await remind_chunk(
+                bucket_start, bucket_end, settings.RENEWAL_BATCH_SIZE
+            )
+            if not reminded:
+                break
+            report.reminded += reminded
+            report.chunks += 1
+        report.buckets += 1
+        bucket_start = bucket_end
+
+    report.duration_ms = int((time.perf_counter() - started) * 1000)
+    last_report = report
+
+    if report.reminded:
+        print(
+            f"[RENEWALS] reminded {report.reminded} subscribers "
+            f"in {report.chunks} chunks, {report.duration_ms} ms"
+        )
+    return report
+
+
+def get_last_report() -> dict | None:
+    return asdict(last_report) if last_report else None
+
+
+async def _run_reminders() -> int:
+    await send_renewal_reminders()
+    # полный проход уже сделан -> ждём следующего интервала
+    return 0
+
+
+worker_pool = PollingWorkerPool(
+    name="RENEWALS",
+    size=1,
+    run_once=_run_reminders,
+    poll_interval=settings.RENEWAL_SCAN_INTERVAL,
+)
+
+
+if __name__ == "__main__":
+    print(asdict(asyncio.run(send_renewal_reminders())))
@@ -0,0 +1,157 @@
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.stripe_event import StripeEvent
+from app.services import subscription_cache, telegram_outbox
+from app.services.fulfilment import fulfil_checkout_session
+from app.services.workers import PollingWorkerPool
+
+# сколько воркер "держит" событие; если он упадёт, событие заберёт другой
+LEASE_SECONDS = 60
+
+
+async def store_event(event: dict) -> bool:
+    """
+    Сохраняет событие Stripe в inbox.
+    Возвращает False, если событие с таким id уже было получено.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            insert(StripeEvent)
+            .values(
+                id=event["id"],
+                type=event["type"],
+                payload=dict(event),
+                status="pending",
+                attempts=0,
+                received_at=datetime.utcnow(),
+                next_attempt_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing(index_elements=[StripeEvent.id])
+        )
+        await db.commit()
+
+    worker_pool.wakeup()
+    return result.rowcount == 1
+
+
+async def claim_events(limit: int) -> list[str]:
+    """
+    Забирает пачку готовых к обработке событий.
+
+    FOR UPDATE SKIP LOCKED -> несколько воркеров (и несколько процессов)
+    никогда не получат одно и то же событие одновременно.
+    """
+    now = datetime.utcnow()
+
+    async with AsyncSessionLocal() as db:
+        ready = (
+            select(StripeEvent.id)
+            .where(
+                or_(
+                    and_(
+                        StripeEvent.status == "pending",
+                        StripeEvent.next_attempt_at <= now,
+                    ),
+                    and_(
+                        StripeEvent.status == "processing",
+                        StripeEvent.locked_until < now,
+                    ),
+                )
+            )
+            .order_by(StripeEvent.received_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(StripeEvent)
+            .where(StripeEvent.id.in_(ready.scalar_subquery()))
+            .values(
+                status="processing",
+                attempts=StripeEvent.attempts + 1,
+                locked_until=now + timedelta(seconds=LEASE_SECONDS),
+            )
+            .returning(StripeEvent.id)
+        )
+        ids = list(result.scalars().all())
+        await db.commit()
+
+    return ids
+
+
+async def process_event(event_id: str) -> None:
+    """
+    Обрабатывает одно событие.
+
+    Бизнес-логика и отметка "processed" коммитятся в одной транзакции,
+    поэтому повторная доставка (at-least-once) не приводит к двойному начислению.
+    """
+    started = time.perf_counter()
+    fulfilment = None
+
+    try:
+        async with AsyncSessionLocal() as db:
+            event = await db.get(StripeEvent, event_id, with_for_update=True)
+            if event is None or event.status == "processed":
+                return
+
+            if event.type == "checkout.session.completed":
+                session_obj = event.payload["data"]["object"]
+                fulfilment = await fulfil_checkout_session(db, session_obj)
+
+            event.status = "processed"
+            event.processed_at = datetime.utcnow()
+            event.locked_until = None
+            event.last_error = None
+            event.processing_ms = int((time.perf_counter() - started) * 1000)
+            await db.commit()
+
+    except Exception as e:
+        print(f"[INBOX] ❌ Failed to process event {event_id}: {e}")
+        await _mark_failed(event_id, e, started)
+        return
+
+    if fulfilment is not None:
+        # после коммита: иначе параллельный запрос мог бы снова закэшировать "нет подписки"
+        subscription_cache.invalidate(fulfilment.telegram_id, fulfilment.project_id)
+        if fulfilment.notified:
+            telegram_outbox.worker_pool.wakeup()
+
+
+async def _mark_failed(event_id: str, error: Exception, started: float) -> None:
+    async with AsyncSessionLocal() as db:
+        event = await db.get(StripeEvent, event_id)
+        if event is None:
+            return
+
+        # экспоненциальный backoff: 2, 4, 8 ... секунд, но не больше 10 минут
+        delay = min(2 ** event.attempts, 600)
+        if event.attempts >= settings.STRIPE_INBOX_MAX_ATTEMPTS:
+            event.status = "failed"
+        else:
+            event.status = "pending"
+        event.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        event.locked_until = None
+        event.last_error = repr(error)[:2000]
+        event.processing_ms = int((time.perf_counter() - started) * 1000)
+        await db.commit()
+
+
+async def process_batch() -> int:
+    ids = await claim_events(settings.STRIPE_INBOX_BATCH_SIZE)
+    for event_id in ids:
+        await process_event(event_id)
+    return len(ids)
+
+
+worker_pool = PollingWorkerPool(
+    name="INBOX",
+    size=settings.STRIPE_INBOX_WORKERS,
+    run_once=process_batch,
+    poll_interval=settings.STRIPE_INBOX_POLL_INTERVAL,
+)
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.models.end_user import EndUser
+from app.models.subscription import Subscription
+from app.schemas.subscription import SubscriptionRead
+
+# (telegram_id, project_id) -> SubscriptionRead dict | MISSING
+active_subscriptions = TTLCache(
+    "active_subscriptions",
+    ttl=settings.ACTIVE_SUBSCRIPTION_CACHE_TTL,
+    max_size=settings.ACTIVE_SUBSCRIPTION_CACHE_SIZE,
+)
+
+
+async def get_active_subscription(
+    db: AsyncSession, telegram_id: int, project_id: int
+) -> dict | None:
+    """
+    Read-through: активная подписка из кэша, при промахе — из БД.
+    "Нет подписки" тоже кэшируется (на ACTIVE_SUBSCRIPTION_NEGATIVE_TTL).
+    """
+    key = (telegram_id, project_id)
+    cached = active_subscriptions.get(key)
+    if cached is MISSING:
+        return None
+    if cached is not None:
+        return cached
+
+    now = datetime.utcnow()
+
+    subscription = await db.scalar(
+        select(Subscription)
+        .join(EndUser, Subscription.end_user_id == EndUser.id)
+        .where(
+            EndUser.telegram_id == telegram_id,
+            Subscription.project_id == project_id,
+            Subscription.status == "active",
+            Subscription.end_at > now,
+        )
+        .order_by(Subscription.end_at.desc())
+        .limit(1)
+    )
+
+    if subscription is None:
+        active_subscriptions.set(key, MISSING, ttl=settings.ACTIVE_SUBSCRIPTION_NEGATIVE_TTL)
+        return None
+
+    data = SubscriptionRead.model_validate(subscription).model_dump(mode="json")
+    # запись не переживёт саму подписку
+    active_subscriptions.set(key, data, ttl=(subscription.end_at - now).total_seconds())
+    return data
+
+
+def invalidate(telegram_id: int, project_id: int) -> None:
+    active_subscriptions.delete((telegram_id, project_id))
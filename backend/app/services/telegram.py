@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+import aiohttp
+
+from app.core.config import settings
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+
+class TelegramAPIError(Exception):
+    def __init__(self, status: int, description: str, retry_after: int | None = None):
+        super().__init__(f"{status}: {description}")
+        self.status = status
+        self.description = description
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status == 429 or self.status >= 500
+
+
+class RateLimiter:
+    """
+    Spaces calls evenly: at most `rate` acquisitions per second (per process).
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class PerChatRateLimiter:
+    """
+    Per-chat spacing: Telegram allows ~1 message/s to a private chat
+    and ~20 messages/minute to a group or channel (negative chat ids).
+    """
+
+    def __init__(self, private_rate: float, group_rate: float, max_chats: int = 100_000):
+        self.private_interval = 1.0 / private_rate
+        self.group_interval = 1.0 / group_rate
+        self.max_chats = max_chats
+        self._next_slot: dict[int, float] = {}
+
+    def _interval(self, chat_id: int) -> float:
+        return self.group_interval if chat_id < 0 else self.private_interval
+
+    def reserve(self, chat_id: int) -> float:
+        """Books the next slot for the chat and returns how long to wait for it."""
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(chat_id, 0.0))
+        self._next_slot[chat_id] = slot + self._interval(chat_id)
+        if len(self._next_slot) > self.max_chats:
+            self._prune(now)
+        return slot - now
+
+    def block(self, chat_id: int, seconds: float) -> None:
+        """Telegram told us to back off (429 retry_after) for this chat."""
+        until = time.monotonic() + seconds
+        self._next_slot[chat_id] = max(self._next_slot.get(chat_id, 0.0), until)
+
+    def _prune(self, now: float) -> None:
+        for chat_id in [c for c, slot in self._next_slot.items() if slot <= now]:
+            del self._next_slot[chat_id]
+
+
+class TelegramClient:
+    """
+    Long-lived Bot API client: one pooled aiohttp session per process,
+    global + per-chat rate limits.
+    """
+
+    def __init__(self, token: str):
+        self.token = token
+        self.global_limiter = RateLimiter(settings.TELEGRAM_GLOBAL_RATE)
+        self.chat_limiter = PerChatRateLimiter(
+            private_rate=settings.TELEGRAM_PER_CHAT_RATE,
+            group_rate=settings.TELEGRAM_PER_GROUP_RATE,
+        )
+        self._session: aiohttp.ClientSession | None = None
+
+    async def start(self) -> None:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                base_url=TELEGRAM_API_URL,
+                connector=aiohttp.TCPConnector(limit=settings.TELEGRAM_HTTP_POOL_SIZE),
+                timeout=aiohttp.ClientTimeout(total=settings.TELEGRAM_HTTP_TIMEOUT),
+            )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def call(self, method: str, payload: dict, chat_id: int | None = None) -> dict:
+        """
+        Calls a Bot API method and returns `result`.
+        Raises TelegramAPIError for non-ok responses.
+        """
+        await self.start()
+
+        if chat_id is not None:
+            wait = self.chat_limiter.reserve(chat_id)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        await self.global_limiter.acquire()
+
+        try:
+            async with self._session.post(f"/bot{self.token}/{method}", json=payload) as resp:
+                status = resp.status
+                try:
+                    data = await resp.json(content_type=None)
+                except ValueError:
+                    data = {"ok": False, "description": await resp.text()}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # сетевые ошибки считаем временными, как 5xx
+            raise TelegramAPIError(503, f"network error: {e!r}")
+
+        if not data.get("ok"):
+            retry_after = (data.get("parameters") or {}).get("retry_after")
+            if retry_after and chat_id is not None:
+                self.chat_limiter.block(chat_id, retry_after)
+            raise TelegramAPIError(
+                data.get("error_code") or status,
+                data.get("description") or "unknown error",
+                retry_after=retry_after,
+            )
+
+        return data.get("result")
+
+
+telegram_client = TelegramClient(settings.BOT_TOKEN)
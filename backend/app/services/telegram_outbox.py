@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.telegram_outbox import TelegramOutbox
+from app.services.telegram import TelegramAPIError, telegram_client
+from app.services.workers import PollingWorkerPool
+
+LEASE_SECONDS = 120
+
+# per-chat лимиты Telegram касаются сообщений, а не админских действий
+PER_CHAT_LIMITED_METHODS = {"sendMessage", "sendPhoto", "sendDocument"}
+
+# "Составные" методы outbox: несколько вызовов Bot API строго по порядку.
+# revokeAccess = выкинуть из канала, но оставить возможность вернуться после оплаты.
+COMPOUND_METHODS = {
+    "revokeAccess": lambda p: [
+        ("banChatMember", {"chat_id": p["chat_id"], "user_id": p["user_id"]}),
+        (
+            "unbanChatMember",
+            {"chat_id": p["chat_id"], "user_id": p["user_id"], "only_if_banned": True},
+        ),
+    ],
+}
+
+
+def enqueue(db: AsyncSession, method: str, chat_id: int, payload: dict) -> TelegramOutbox:
+    """
+    Добавляет вызов Bot API в outbox. Коммитит вызывающий код —
+    сообщение уйдёт только если бизнес-транзакция успешно зафиксирована.
+    """
+    message = TelegramOutbox(
+        method=method,
+        chat_id=chat_id,
+        payload=payload,
+        status="pending",
+        attempts=0,
+        created_at=datetime.utcnow(),
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(message)
+    return message
+
+
+def enqueue_message(db: AsyncSession, chat_id: int, text: str, **kwargs) -> TelegramOutbox:
+    return enqueue(db, "sendMessage", chat_id, {"chat_id": chat_id, "text": text, **kwargs})
+
+
+async def claim_messages(limit: int) -> list[TelegramOutbox]:
+    now = datetime.utcnow()
+
+    async with AsyncSessionLocal() as db:
+        ready = (
+            select(TelegramOutbox.id)
+            .where(
+                or_(
+                    and_(
+                        TelegramOutbox.status == "pending",
+                        TelegramOutbox.next_attempt_at <= now,
+                    ),
+                    and_(
+                        TelegramOutbox.status == "sending",
+                        TelegramOutbox.locked_until < now,
+                    ),
+                )
+            )
+            .order_by(TelegramOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.scalars(
+            update(TelegramOutbox)
+            .where(TelegramOutbox.id.in_(ready.scalar_subquery()))
+            .values(
+                status="sending",
+                attempts=TelegramOutbox.attempts + 1,
+                locked_until=now + timedelta(seconds=LEASE_SECONDS),
+            )
+            .returning(TelegramOutbox)
+        )
+        messages = list(result.all())
+        await db.commit()
+
+    return messages
+
+
+async def _call(message: TelegramOutbox) -> None:
+    chat_id = message.chat_id if message.method in PER_CHAT_LIMITED_METHODS else None
+
+    if message.method in COMPOUND_METHODS:
+        calls = COMPOUND_METHODS[message.method](message.payload)
+    else:
+        calls = [(message.method, message.payload)]
+
+    for method, payload in calls:
+        await telegram_client.call(method, payload, chat_id=chat_id)
+
+
+async def _deliver(message: TelegramOutbox) -> None:
+    values = {"locked_until": None}
+    try:
+        await _call(message)
+        values.update(status="sent", sent_at=datetime.utcnow(), last_error=None)
+    except TelegramAPIError as e:
+        values["last_error"] = str(e)[:2000]
+        if e.retryable and message.attempts < settings.TELEGRAM_OUTBOX_MAX_ATTEMPTS:
+            # 429 -> ждём ровно столько, сколько просит Telegram; 5xx -> backoff
+            delay = e.retry_after or min(2 ** message.attempts, 300)
+            values.update(
+                status="pending",
+                next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+            )
+        else:
+            # 400/403 (чат не найден, бот заблокирован) повторять бессмысленно
+            values["status"] = "failed"
+            print(f"[OUTBOX] ❌ {message.method} to {message.chat_id} failed: {e}")
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(TelegramOutbox).where(TelegramOutbox.id == message.id).values(**values)
+        )
+        await db.commit()
+
+
+async def dispatch_batch() -> int:
+    messages = await claim_messages(settings.TELEGRAM_OUTBOX_BATCH_SIZE)
+    # лимиты скорости внутри клиента, поэтому пачку можно слать параллельно
+    await asyncio.gather(*(_deliver(m) for m in messages))
+    return len(messages)
+
+
+worker_pool = PollingWorkerPool(
+    name="OUTBOX",
+    size=settings.TELEGRAM_OUTBOX_WORKERS,
+    run_once=dispatch_batch,
+    poll_interval=settings.TELEGRAM_OUTBOX_POLL_INTERVAL,
+)
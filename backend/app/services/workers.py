@@ -0,0 +1,58 @@
+import asyncio
+from typing import Awaitable, Callable
+
+
+class PollingWorkerPool:
+    """
+    N asyncio tasks that repeatedly call `run_once`.
+
+    `run_once` returns how many items it handled; when it returns 0 the worker
+    sleeps until `wakeup()` is called or `poll_interval` seconds pass.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        run_once: Callable[[], Awaitable[int]],
+        poll_interval: float,
+    ):
+        self.name = name
+        self.size = size
+        self.run_once = run_once
+        self.poll_interval = poll_interval
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+
+    def wakeup(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        for worker_id in range(self.size):
+            self._tasks.append(asyncio.create_task(self._loop(worker_id)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _loop(self, worker_id: int) -> None:
+        while True:
+            try:
+                handled = await self.run_once()
+            except Exception as e:
+                print(f"[{self.name}] ⚠ worker {worker_id} failed: {e}")
+                handled = 0
+
+            if handled:
+                continue
+
+            # пусто — ждём нового события или следующего опроса
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
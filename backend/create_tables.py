@@ -1,39 +1,28 @@
-﻿from sqlalchemy import text
-from app.db.session import engine
-from app.db.base import Base
-
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
 
-def show_columns(conn):
-    rows = conn.execute(
-        text(
-            "SELECT column_name FROM information_schema.columns "
-            "WHERE table_name = 'payments' ORDER BY column_name"
-        )
-    ).fetchall()
-    print("Columns in payments:", [r[0] for r in rows])
+from app.db.session import engine
 
 
 def main():
-    print("=== Using DB:", engine.url, "===")
+    """
+    Приводит схему БД к последней версии миграций.
 
-    # сначала покажем, что было
-    with engine.begin() as conn:
-        print("=== BEFORE DROP ===")
-        show_columns(conn)
+    Если таблицы уже были созданы старым create_all() (без alembic_version),
+    сначала помечаем базу как baseline-ревизию 0001, чтобы не создавать их заново.
+    """
+    print("=== Using DB:", engine.url, "===")
 
-        print("Dropping table payments (if exists)...")
-        conn.execute(text("DROP TABLE IF EXISTS payments CASCADE"))
-        print("✅ payments dropped")
+    config = Config("alembic.ini")
+    tables = set(inspect(engine).get_table_names())
 
-    # создаём все таблицы по моделям
-    print("Creating tables from models...")
-    Base.metadata.create_all(bind=engine)
-    print("Tables created.")
+    if "users" in tables and "alembic_version" not in tables:
+        print("Existing schema without alembic_version -> stamping baseline 0001")
+        command.stamp(config, "0001")
 
-    # смотрим, что стало с payments
-    with engine.begin() as conn:
-        print("=== AFTER CREATE ===")
-        show_columns(conn)
+    command.upgrade(config, "head")
+    print("✅ Schema is up to date.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,112 @@
+"""
+Behaviour tests for the money paths. They run against a real PostgreSQL
+(upserts, advisory locks and txid snapshots have no in-memory stand-in):
+the TEST_POSTGRES_DB database, "app_test" by default, on the POSTGRES_*
+server is created if needed and migrated from scratch on every run.
+"""
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+os.environ["POSTGRES_DB"] = os.environ.get("TEST_POSTGRES_DB", "app_test")
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db import base  # noqa: E402,F401  (registers every model)
+from app.db.session import SessionLocal, async_engine, engine  # noqa: E402
+from app.models.plan import SubscriptionPlan  # noqa: E402
+from app.models.project import Project  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _create_database() -> None:
+    server_uri = settings.SQLALCHEMY_DATABASE_URI.rsplit("/", 1)[0] + "/postgres"
+    server = create_engine(server_uri, isolation_level="AUTOCOMMIT")
+    try:
+        with server.connect() as conn:
+            exists = conn.scalar(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"),
+                {"name": settings.POSTGRES_DB},
+            )
+            if not exists:
+                conn.execute(text(f'CREATE DATABASE "{settings.POSTGRES_DB}"'))
+    finally:
+        server.dispose()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    try:
+        _create_database()
+    except OperationalError as e:
+        pytest.skip(f"PostgreSQL is not available: {e.orig}")
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE; CREATE SCHEMA public"))
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    command.upgrade(config, "head")
+    yield
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def run():
+    """
+    Runs a coroutine to completion. One loop for the whole session: asyncpg
+    connections in the async pool are bound to the loop that opened them.
+    """
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.run_until_complete(async_engine.dispose())
+    loop.close()
+
+
+@pytest.fixture(autouse=True)
+def clean_tables(database):
+    with engine.begin() as conn:
+        tables = conn.scalars(
+            text(
+                "SELECT tablename FROM pg_tables "
+                "WHERE schemaname = 'public' AND tablename != 'alembic_version'"
+            )
+        ).all()
+        conn.execute(
+            text(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE")
+        )
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def creator(db) -> User:
+    user = User(telegram_id=1000, name="Creator")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def plan(db, creator) -> SubscriptionPlan:
+    project = Project(user_id=creator.id, title="Channel", username="channel")
+    db.add(project)
+    db.flush()
+    plan = SubscriptionPlan(
+        project_id=project.id, name="Monthly", price=9.99, currency="EUR", duration_days=30
+    )
+    db.add(plan)
+    db.commit()
+    return plan
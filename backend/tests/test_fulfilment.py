@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.db.session import AsyncSessionLocal
+from app.models.ledger import LedgerEntry
+from app.models.payment import Payment
+from app.models.plan import SubscriptionPlan
+from app.models.stats import CreatorStats
+from app.models.subscription import Subscription
+from app.models.telegram_outbox import TelegramOutbox
+from app.services import ledger
+from app.services.fulfilment import fulfil_checkout_session
+
+
+def checkout_session(plan, session_id="cs_test_1", telegram_id=555):
+    return {
+        "id": session_id,
+        "amount_total": 999,
+        "currency": "eur",
+        "metadata": {
+            "telegram_id": str(telegram_id),
+            "plan_id": str(plan.id),
+            "project_id": str(plan.project_id),
+        },
+    }
+
+
+async def deliver(session_obj):
+    """One webhook delivery: fulfilment and commit in their own transaction."""
+    async with AsyncSessionLocal() as db:
+        result = await fulfil_checkout_session(db, session_obj)
+        await db.commit()
+        return result
+
+
+async def deliver_concurrently(session_obj, times: int):
+    return await asyncio.gather(*(deliver(session_obj) for _ in range(times)))
+
+
+def test_duplicate_webhook_credits_once(run, db, plan, creator):
+    session_obj = checkout_session(plan)
+
+    first = run(deliver(session_obj))
+    # Stripe retries: once after the first delivery, twice more at the same time
+    again = run(deliver(session_obj))
+    racing = run(deliver_concurrently(session_obj, 2))
+
+    assert first is not None and first.notified
+    assert again is None
+    assert racing == [None, None]
+
+    entries = db.execute(
+        select(LedgerEntry.entry_type, LedgerEntry.amount_cents).order_by(LedgerEntry.id)
+    ).all()
+    assert entries == [(ledger.PAYMENT_CREDIT, 999), (ledger.PLATFORM_FEE, -100)]
+    assert ledger.get_balance_cents(db, creator.id) == 899
+
+    assert db.scalar(select(func.count()).select_from(Payment)) == 1
+    assert db.scalar(select(func.count()).select_from(Subscription)) == 1
+    assert db.scalar(select(func.count()).select_from(TelegramOutbox)) == 1
+    assert db.get(CreatorStats, creator.id).paid_payments == 1
+
+
+def test_payment_without_plan_is_not_credited(run, db, plan, creator):
+    session_obj = checkout_session(plan)
+    session_obj["metadata"]["plan_id"] = "0"
+
+    assert run(deliver(session_obj)) is None
+
+    assert db.scalar(select(func.count()).select_from(LedgerEntry)) == 0
+    stats = db.get(CreatorStats, creator.id)
+    assert stats is None or stats.paid_payments == 0
+
+
+def test_paying_again_extends_the_active_subscription(run, db, plan, creator):
+    run(deliver(checkout_session(plan, "cs_test_1")))
+    subscription = db.scalars(select(Subscription)).one()
+    first_end_at = subscription.end_at
+    subscription.renewal_reminded_at = datetime.utcnow()
+    db.commit()
+
+    result = run(deliver(checkout_session(plan, "cs_test_2")))
+
+    assert result is not None and result.notified
+    db.expire_all()
+    subscription = db.scalars(select(Subscription)).one()
+    assert subscription.status == "active"
+    assert subscription.end_at == first_end_at + timedelta(days=plan.duration_days)
+    # the next period gets its own reminder
+    assert subscription.renewal_reminded_at is None
+
+    stats = db.get(CreatorStats, creator.id)
+    assert (stats.active_subscribers, stats.paid_payments) == (1, 2)
+    assert ledger.get_balance_cents(db, creator.id) == 2 * 899
+
+
+def test_another_plan_gets_its_own_subscription(run, db, plan):
+    yearly = SubscriptionPlan(
+        project_id=plan.project_id, name="Yearly", price=99.0, currency="EUR", duration_days=365
+    )
+    db.add(yearly)
+    db.commit()
+
+    run(deliver(checkout_session(plan, "cs_test_1")))
+    run(deliver(checkout_session(yearly, "cs_test_2")))
+
+    assert db.scalar(select(func.count()).select_from(Subscription)) == 2
@@ -0,0 +1,61 @@
+from sqlalchemy import func, select
+
+from app.models.ledger import BalanceSnapshot, LedgerEntry
+from app.models.user import User
+from app.services import ledger
+
+
+def full_sum(db, user_id: int) -> int:
+    return db.scalar(
+        select(func.coalesce(func.sum(LedgerEntry.amount_cents), 0)).where(
+            LedgerEntry.user_id == user_id
+        )
+    )
+
+
+def add_entries(db, users, round_no: int) -> None:
+    """A few committed transactions per creator, each with its own txid."""
+    for n, user in enumerate(users, start=1):
+        ledger.add_adjustment(db, user.id, 1000 * n + round_no, f"credit {round_no}")
+        db.commit()
+        ledger.add_adjustment(db, user.id, -(10 * n), f"debit {round_no}")
+        db.commit()
+
+
+def test_rollup_and_balance_match_full_ledger_sum(run, db):
+    users = [User(telegram_id=2000 + n) for n in range(3)]
+    db.add_all(users)
+    db.commit()
+    idle = users[2]
+
+    add_entries(db, users[:2], 1)
+    assert run(ledger.rollup_balances()) == 2
+
+    snapshots = {s.user_id: s for s in db.scalars(select(BalanceSnapshot))}
+    assert set(snapshots) == {users[0].id, users[1].id}
+    for user in users[:2]:
+        assert snapshots[user.id].balance_cents == full_sum(db, user.id)
+
+    # entries after the snapshot horizon: balance = snapshot + tail
+    add_entries(db, users, 2)
+    for user in users:
+        assert ledger.get_balance_cents(db, user.id) == full_sum(db, user.id)
+    assert ledger.verify_snapshots(db) == []
+
+    # rolling up again never counts an entry twice
+    run(ledger.rollup_balances())
+    run(ledger.rollup_balances())
+    db.expire_all()
+    for user in users:
+        assert db.get(BalanceSnapshot, user.id).balance_cents == full_sum(db, user.id)
+        assert ledger.get_balance_cents(db, user.id) == full_sum(db, user.id)
+    assert ledger.verify_snapshots(db) == []
+    assert ledger.get_balance_cents(db, idle.id) == full_sum(db, idle.id) != 0
+
+
+def test_balance_without_entries_is_zero(db):
+    user = User(telegram_id=3000)
+    db.add(user)
+    db.commit()
+
+    assert ledger.get_balance_cents(db, user.id) == 0
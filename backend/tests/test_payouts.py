@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.ledger import LedgerEntry
+from app.models.payout import PayoutRequest
+from app.services import ledger, payouts
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    backend = payouts.FakePayoutBackend()
+    monkeypatch.setattr(payouts, "backend", backend)
+    return backend
+
+
+def request_payout(db, user_id: int, amount_cents: int, method="iban", details="DE00 1234"):
+    """What POST /payouts does: the request and its ledger debit in one transaction."""
+    ledger.add_adjustment(db, user_id, 5000, "opening balance")
+    payout = PayoutRequest(
+        user_id=user_id,
+        amount_cents=amount_cents,
+        status="pending",
+        payout_method=method,
+        payout_details=details,
+    )
+    db.add(payout)
+    db.flush()
+    ledger.debit_payout(db, user_id, payout.id, amount_cents)
+    db.commit()
+    return payout
+
+
+def test_failed_payout_is_refunded_through_adjustment(run, db, creator, fake_backend):
+    payout = request_payout(db, creator.id, 3000, details=None)
+    assert ledger.get_balance_cents(db, creator.id) == 2000
+
+    assert run(payouts.process_batch()) == 1
+    # the request is final now: another pass neither claims nor refunds it
+    assert run(payouts.process_batch()) == 0
+
+    db.refresh(payout)
+    assert payout.status == "failed"
+    assert payout.last_error
+    refunds = db.scalars(
+        select(LedgerEntry).where(
+            LedgerEntry.entry_type == ledger.ADJUSTMENT,
+            LedgerEntry.payout_id == payout.id,
+        )
+    ).all()
+    assert [r.amount_cents for r in refunds] == [3000]
+    assert ledger.get_balance_cents(db, creator.id) == 5000
+    assert fake_backend.transfers == {}
+
+
+def test_retryable_failure_backs_off_then_refunds(run, db, creator, fake_backend, monkeypatch):
+    monkeypatch.setattr(settings, "PAYOUT_MAX_ATTEMPTS", 2)
+    fake_backend.failure_rate = 1.0
+    payout = request_payout(db, creator.id, 3000)
+
+    run(payouts.process_batch())
+    db.refresh(payout)
+    assert (payout.status, payout.attempts) == ("pending", 1)
+    assert payout.next_attempt_at > datetime.utcnow()
+    assert ledger.get_balance_cents(db, creator.id) == 2000
+
+    payout.next_attempt_at = datetime.utcnow()
+    db.commit()
+    run(payouts.process_batch())
+    db.refresh(payout)
+    assert (payout.status, payout.attempts) == ("failed", 2)
+    assert ledger.get_balance_cents(db, creator.id) == 5000
+
+
+def test_paid_payout_keeps_the_debit(run, db, creator, fake_backend):
+    payout = request_payout(db, creator.id, 3000)
+
+    run(payouts.process_batch())
+
+    db.refresh(payout)
+    assert payout.status == "paid"
+    assert payout.external_reference == fake_backend.transfers[f"payout-{payout.id}"]["reference"]
+    assert ledger.get_balance_cents(db, creator.id) == 2000
+
+
+def test_without_backend_payouts_stay_pending(run, db, creator, monkeypatch):
+    monkeypatch.setattr(payouts, "backend", None)
+    payout = request_payout(db, creator.id, 3000)
+
+    assert run(payouts.process_batch()) == 0
+
+    db.refresh(payout)
+    assert (payout.status, payout.attempts) == ("pending", 0)
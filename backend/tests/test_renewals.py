@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.end_user import EndUser
+from app.models.subscription import Subscription
+from app.models.telegram_outbox import TelegramOutbox
+from app.services import renewals
+
+
+def subscribe(db, plan, telegram_id: int, ends_in: timedelta, **fields) -> Subscription:
+    end_user = EndUser(telegram_id=telegram_id)
+    db.add(end_user)
+    db.flush()
+    subscription = Subscription(
+        end_user_id=end_user.id,
+        project_id=plan.project_id,
+        plan_id=plan.id,
+        end_at=datetime.utcnow() + ends_in,
+        status="active",
+        **fields,
+    )
+    db.add(subscription)
+    db.commit()
+    return subscription
+
+
+@pytest.fixture
+def public_url(monkeypatch):
+    monkeypatch.setattr(settings, "BACKEND_PUBLIC_URL", "https://api.example.com/")
+
+
+def test_reminds_each_due_subscription_once(run, db, plan, public_url):
+    due = subscribe(db, plan, 501, timedelta(hours=20))
+    subscribe(db, plan, 502, timedelta(hours=20), renewal_reminders=False)
+    subscribe(db, plan, 503, timedelta(days=20))
+
+    assert run(renewals.send_renewal_reminders()).reminded == 1
+    assert run(renewals.send_renewal_reminders()).reminded == 0
+
+    messages = db.scalars(select(TelegramOutbox)).all()
+    assert [m.chat_id for m in messages] == [501]
+    buttons = messages[0].payload["reply_markup"]["inline_keyboard"]
+    assert buttons[0][0]["url"] == (
+        f"https://api.example.com/api/v1/payments/renew/{due.id}"
+        f"?sig={renewals.renewal_signature(due.id)}"
+    )
+    assert buttons[1][0]["callback_data"] == f"reminders_off:{plan.project_id}"
+
+
+@pytest.mark.parametrize("url", ["", "/relative", "http://api.example.com"])
+def test_no_reminders_without_https_public_url(run, db, plan, monkeypatch, url):
+    monkeypatch.setattr(settings, "BACKEND_PUBLIC_URL", url)
+    subscription = subscribe(db, plan, 501, timedelta(hours=20))
+
+    assert run(renewals.send_renewal_reminders()).reminded == 0
+
+    db.refresh(subscription)
+    assert subscription.renewal_reminded_at is None
+    assert db.scalars(select(TelegramOutbox)).all() == []
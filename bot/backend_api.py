@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import hmac
+import random
+import time
+import uuid
+
+import aiohttp
+
+from config import settings
+
+# statuses worth retrying for idempotent calls (backend restarting / overloaded)
+RETRY_STATUSES = {502, 503, 504}
+
+
+class BackendError(Exception):
+    def __init__(self, status: int, text: str):
+        super().__init__(f"{status}: {text}")
+        self.status = status
+        self.text = text
+
+
+def signed_headers(telegram_id: int) -> dict:
+    """
+    X-Bot-Signature for calls made on behalf of a Telegram user: the backend
+    trusts `telegram_id` only with it. The key is derived from BOT_TOKEN.
+    """
+    timestamp = int(time.time())
+    key = hashlib.sha256(f"bot-request:{settings.BOT_TOKEN}".encode()).digest()
+    signature = hmac.new(
+        key, f"{timestamp}.{telegram_id}".encode(), hashlib.sha256
+    ).hexdigest()
+    return {"X-Bot-Signature": f"t={timestamp},v1={signature}"}
+
+
+class BackendClient:
+    """
+    One keep-alive connection pool to the backend for the whole bot process.
+
+    Created on dispatcher startup and closed on shutdown. Every call has a
+    timeout; idempotent calls are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self._session: aiohttp.ClientSession | None = None
+
+    async def start(self) -> None:
+        if self._session is not None:
+            return
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=settings.BACKEND_POOL_SIZE,
+                keepalive_timeout=settings.BACKEND_KEEPALIVE,
+            ),
+            timeout=aiohttp.ClientTimeout(total=settings.BACKEND_TIMEOUT),
+        )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        idempotent: bool,
+        ok: tuple[int, ...] = (200,),
+        **kwargs,
+    ) -> tuple[int, object]:
+        if self._session is None:
+            await self.start()
+
+        retries = settings.BACKEND_RETRIES if idempotent else 0
+        attempt = 0
+        while True:
+            try:
+                async with self._session.request(
+                    method, f"{self.base_url}{path}", **kwargs
+                ) as resp:
+                    if resp.status not in ok:
+                        raise BackendError(resp.status, await resp.text())
+                    data = await resp.json() if resp.status == 200 else None
+                    return resp.status, data
+            except (aiohttp.ClientError, asyncio.TimeoutError, BackendError) as e:
+                if isinstance(e, BackendError) and e.status not in RETRY_STATUSES:
+                    raise
+                if attempt >= retries:
+                    raise
+                # full jitter: spreads out the retries of many concurrent updates
+                await asyncio.sleep(
+                    random.uniform(0, settings.BACKEND_RETRY_BACKOFF * 2 ** attempt)
+                )
+                attempt += 1
+
+    # ---- users ----
+
+    async def register_user(
+        self, telegram_id: int, name: str | None, username: str | None, language: str = "en"
+    ) -> dict:
+        # create-or-get on the backend side, safe to repeat
+        _, data = await self._request(
+            "POST",
+            "/api/v1/users/",
+            idempotent=True,
+            json={
+                "telegram_id": telegram_id,
+                "name": name,
+                "username": username,
+                "language": language,
+            },
+        )
+        return data
+
+    # ---- subscriber side ----
+
+    async def get_subscribe_landing(self, telegram_id: int, project_id: int) -> dict:
+        # active subscription + plans + ready buy buttons in one call
+        _, data = await self._request(
+            "GET",
+            "/api/v1/subscriptions/landing",
+            idempotent=True,
+            params={"telegram_id": telegram_id, "project_id": project_id, "keyboard": "true"},
+        )
+        return data
+
+    async def checkout(self, plan_id: int, telegram_id: int) -> dict:
+        # price comes from the plan on the backend side;
+        # the Idempotency-Key makes retries return the same Stripe session
+        _, data = await self._request(
+            "POST",
+            "/api/v1/payments/checkout",
+            idempotent=True,
+            params={"plan_id": plan_id, "telegram_id": telegram_id},
+            headers={"Idempotency-Key": str(uuid.uuid4())},
+        )
+        return data
+
+    async def set_renewal_reminders(
+        self, telegram_id: int, project_id: int, enabled: bool
+    ) -> dict:
+        # same value on every retry -> safe to repeat
+        _, data = await self._request(
+            "POST",
+            "/api/v1/subscriptions/renewal-reminders",
+            idempotent=True,
+            params={
+                "telegram_id": telegram_id,
+                "project_id": project_id,
+                "enabled": "true" if enabled else "false",
+            },
+            headers=signed_headers(telegram_id),
+        )
+        return data
+
+    # ---- creator side ----
+
+    async def connect_channel(
+        self, connection_code: str, telegram_channel_id: int, channel_title: str | None
+    ) -> dict:
+        # connection codes are single use -> never retried
+        _, data = await self._request(
+            "POST",
+            "/api/v1/projects/connect-channel",
+            idempotent=False,
+            json={
+                "connection_code": connection_code,
+                "telegram_channel_id": telegram_channel_id,
+                "channel_title": channel_title,
+            },
+        )
+        return data
+
+
+backend = BackendClient(settings.BACKEND_URL)
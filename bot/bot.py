@@ -1,16 +1,18 @@
 ﻿import asyncio
 
-import aiohttp
 from aiogram import Bot, Dispatcher
 from aiogram.filters import CommandStart
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 
+from backend_api import backend
 from config import settings
 from handlers import creator, subscriber
+from state import close_stores, fsm_storage
+from webhook import run_webhook
 
 
 bot = Bot(token=settings.BOT_TOKEN)
-dp = Dispatcher()
+dp = Dispatcher(storage=fsm_storage)
 
 
 @dp.message(CommandStart())
@@ -44,61 +46,38 @@ async def cmd_start(message: Message):
 
         telegram_id = message.from_user.id
 
-        # 2.1) Check active subscription
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(
-                    f"{settings.BACKEND_URL}/api/v1/subscriptions/active",
-                    params={"telegram_id": telegram_id, "project_id": project_id},
-                ) as resp_sub:
-                    if resp_sub.status == 200:
-                        sub = await resp_sub.json()
-                        end_at = sub["end_at"]
-
-                        await message.answer(
-                            (
-                                "🎉 You already have an active subscription to this channel.\n"
-                                f"It is valid until: <b>{end_at}</b>\n\n"
-                                "You can safely use the channel 😉"
-                            ),
-                            parse_mode="HTML",
-                        )
-                        return
-
-                    elif resp_sub.status not in (200, 404):
-                        text_err = await resp_sub.text()
-                        print(
-                            f"Error checking subscription: "
-                            f"{resp_sub.status} {text_err}"
-                        )
-
-            except Exception as e:
-                print("Exception while checking subscription:", e)
-
-        # 2.2) Load plans if there is no active subscription
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{settings.BACKEND_URL}/api/v1/plans/project/{project_id}"
-            ) as resp:
-                if resp.status != 200:
-                    await message.answer("Error while loading plans.")
-                    return
-                plans = await resp.json()
-
-        if not plans:
+        # 2.1) Active subscription + plans in one backend call
+        try:
+            landing = await backend.get_subscribe_landing(telegram_id, project_id)
+        except Exception as e:
+            print("Exception while loading subscription landing:", e)
+            await message.answer("Error while loading plans.")
+            return
+
+        sub = landing["subscription"]
+        if sub:
+            end_at = sub["end_at"]
+
+            await message.answer(
+                (
+                    "🎉 You already have an active subscription to this channel.\n"
+                    f"It is valid until: <b>{end_at}</b>\n\n"
+                    "You can safely use the channel 😉"
+                ),
+                parse_mode="HTML",
+            )
+            return
+
+        # 2.2) No active subscription -> offer plans
+        if not landing["plans"]:
             await message.answer("This channel has no active plans yet.")
             return
 
-        # Build keyboard with plans
+        # buttons come prebuilt from the backend
         keyboard = InlineKeyboardMarkup(
             inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text=f"{plan['name']} — {plan['price']} {plan['currency']}",
-                        callback_data=f"buy:{plan['id']}",
-                    )
-                ]
-                for plan in plans
+                [InlineKeyboardButton(**button) for button in row]
+                for row in landing["keyboard"]
             ]
         )
 
@@ -116,11 +95,24 @@ async def cmd_start(message: Message):
     )
 
 
-async def main():
+def setup_dispatcher() -> None:
     dp.include_router(creator.router)
     dp.include_router(subscriber.router)
+    # one pooled backend session for the whole process
+    dp.startup.register(backend.start)
+    dp.shutdown.register(backend.close)
+    dp.shutdown.register(close_stores)
+
+
+async def main():
+    # polling gets its updates from getUpdates, so drop a webhook left from webhook mode
+    await bot.delete_webhook()
     await dp.start_polling(bot)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    setup_dispatcher()
+    if settings.BOT_MODE == "webhook":
+        run_webhook(dp, bot)
+    else:
+        asyncio.run(main())
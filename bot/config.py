@@ -7,6 +7,31 @@ class BotSettings(BaseSettings):
     FRONTEND_URL: str = "https://fanstero.netlify.app"   # ← добавили !!!
     DEFAULT_LANGUAGE: str = "en"
 
+    # Backend HTTP client (backend_api.py)
+    BACKEND_POOL_SIZE: int = 20
+    BACKEND_KEEPALIVE: float = 60.0
+    BACKEND_TIMEOUT: float = 10.0
+    BACKEND_RETRIES: int = 2
+    BACKEND_RETRY_BACKOFF: float = 0.3
+
+    # Per-user bot state (state.py): pending connection codes + aiogram FSM.
+    # "memory" is per process; "redis" is shared between bot replicas.
+    STATE_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    PENDING_STATE_TTL: float = 3600.0
+    PENDING_STATE_MAX_ENTRIES: int = 10_000
+
+    # Update delivery: "polling" (single process) or "webhook" (webhook.py,
+    # any number of replicas behind a load balancer).
+    BOT_MODE: str = "polling"
+    WEBHOOK_BASE_URL: str = ""   # public https://host Telegram will call
+    WEBHOOK_PATH: str = "/telegram/webhook"
+    WEBHOOK_SECRET: str = ""     # checked against X-Telegram-Bot-Api-Secret-Token
+    WEBHOOK_MAX_CONNECTIONS: int = 100
+    WEBHOOK_DEDUPE_TTL: float = 600.0
+    WEBAPP_HOST: str = "0.0.0.0"
+    WEBAPP_PORT: int = 8080
+
     class Config:
         env_file = ".env"
 
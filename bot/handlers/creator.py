@@ -1,5 +1,4 @@
-﻿import aiohttp
-from aiogram import Router
+﻿from aiogram import Router
 from aiogram.types import (
     Message,
     ChatMemberUpdated,
@@ -7,12 +6,16 @@ from aiogram.types import (
     InlineKeyboardButton,
 )
 
+from backend_api import BackendError, backend
 from config import settings
+from state import pending_store
 
 router = Router()
 
-# user_id -> connection_code
-pending_codes: dict[int, str] = {}
+
+def _pending_key(user_id: int) -> str:
+    # connect:<creator telegram id> -> connection_code
+    return f"connect:{user_id}"
 
 
 async def start_connect_flow(message: Message, connection_code: str):
@@ -25,24 +28,18 @@ async def start_connect_flow(message: Message, connection_code: str):
     """
 
     # remember connection code for user
-    pending_codes[message.from_user.id] = connection_code
+    await pending_store.set(_pending_key(message.from_user.id), connection_code)
 
     # register/update creator in backend
-    payload = {
-        "telegram_id": message.from_user.id,
-        "name": message.from_user.full_name,
-        "username": message.from_user.username,
-        "language": "en",
-    }
-
-    async with aiohttp.ClientSession() as session:
-        try:
-            await session.post(
-                f"{settings.BACKEND_URL}/api/v1/users/",
-                json=payload,
-            )
-        except Exception as e:
-            print("Error while registering creator:", e)
+    try:
+        await backend.register_user(
+            telegram_id=message.from_user.id,
+            name=message.from_user.full_name,
+            username=message.from_user.username,
+            language="en",
+        )
+    except Exception as e:
+        print("Error while registering creator:", e)
 
     me = await message.bot.get_me()
     bot_username = me.username
@@ -95,38 +92,27 @@ async def on_bot_added_to_channel(update: ChatMemberUpdated):
     bot = update.bot
 
     # get previously stored connection_code for this user
-    connection_code = pending_codes.get(user.id)
+    connection_code = await pending_store.get(_pending_key(user.id))
     if not connection_code:
         # no active connect session for this user
         return
 
-    payload = {
-        "connection_code": connection_code,
-        "telegram_channel_id": chat.id,
-        "channel_title": chat.title,
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            f"{settings.BACKEND_URL}/api/v1/projects/connect-channel",
-            json=payload,
-        ) as resp:
-            if resp.status != 200:
-                error_text = await resp.text()
-                await bot.send_message(
-                    user.id,
-                    "❌ Failed to connect your channel.\n"
-                    "Please try again.\n\n"
-                    f"Technical error:\n{resp.status}\n{error_text}",
-                )
-                return
-
-            data = await resp.json()
-            project_id = data.get("project_id")
-            print("Channel connected, project_id =", project_id)
+    try:
+        data = await backend.connect_channel(connection_code, chat.id, chat.title)
+    except BackendError as e:
+        await bot.send_message(
+            user.id,
+            "❌ Failed to connect your channel.\n"
+            "Please try again.\n\n"
+            f"Technical error:\n{e.status}\n{e.text}",
+        )
+        return
+
+    project_id = data.get("project_id")
+    print("Channel connected, project_id =", project_id)
 
     # connection completed -> remove code
-    pending_codes.pop(user.id, None)
+    await pending_store.delete(_pending_key(user.id))
 
     dashboard_url = settings.FRONTEND_URL.rstrip("/") + "/app/channels"
 
@@ -1,9 +1,8 @@
-﻿import aiohttp
-from aiogram import Router, F
+﻿from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
-from config import settings
+from backend_api import BackendError, backend
 
 router = Router()
 
@@ -21,43 +20,18 @@ async def subscriber_start(message: Message):
 async def buy_plan(callback: CallbackQuery):
     # callback_data у нас вида "buy:1"
     plan_id = int(callback.data.split(":", 1)[1])
-    # 1) Получаем информацию о тарифе из backend
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{settings.BACKEND_URL}/api/v1/plans/{plan_id}") as resp:
-            if resp.status != 200:
-                text = await resp.text()
-                await callback.message.answer(
-                    f"❌ Не удалось получить тариф.\nСтатус: {resp.status}\n{text}"
-                )
-                return
-            plan = await resp.json()
-
-        amount = float(plan["price"])
-        currency = plan["currency"]
-        project_id = plan["project_id"]
-
-        # 2) Создаём Stripe Checkout Session
-        async with session.post(
-            f"{settings.BACKEND_URL}/api/v1/payments/stripe/session",
-            params={
-                "plan_id": plan_id,
-                "project_id": project_id,
-                "amount": amount,
-                "currency": currency,
-                "telegram_id": callback.from_user.id,  # 👈 ДОБАВИЛИ ВАЖНОЕ ПОЛЕ
-            },
-        ) as resp2:
-            if resp2.status != 200:
-                text = await resp2.text()
-                await callback.message.answer(
-                    f"❌ Не удалось создать платёжную сессию.\nСтатус: {resp2.status}\n{text}"
-                )
-                return
-            data = await resp2.json()
+    # 1) Создаём Stripe Checkout Session (цену backend берёт из тарифа)
+    try:
+        data = await backend.checkout(plan_id, telegram_id=callback.from_user.id)
+    except BackendError as e:
+        await callback.message.answer(
+            f"❌ Не удалось создать платёжную сессию.\nСтатус: {e.status}\n{e.text}"
+        )
+        return
 
     checkout_url = data["checkout_url"]
 
-    # 3) Отправляем пользователю кнопку с оплатой
+    # 2) Отправляем пользователю кнопку с оплатой
     await callback.message.answer(
         "💳 Для оформления подписки оплатите тариф по ссылке:",
         reply_markup=InlineKeyboardMarkup(
@@ -74,3 +48,28 @@ async def buy_plan(callback: CallbackQuery):
 
     # 👉 На этом этапе МЫ НЕ СОЗДАЁМ подписку и не выдаём инвайт!
     # Это сделаем позже через Stripe webhook (когда будет подтверждение оплаты).
+
+
+@router.callback_query(F.data.startswith("reminders_off:"))
+async def renewal_reminders_off(callback: CallbackQuery):
+    # кнопка из напоминания о продлении: "reminders_off:<project_id>"
+    project_id = int(callback.data.split(":", 1)[1])
+    try:
+        await backend.set_renewal_reminders(
+            callback.from_user.id, project_id, enabled=False
+        )
+    except BackendError as e:
+        if e.status != 404:
+            await callback.answer("❌ Не удалось отключить напоминания", show_alert=True)
+            return
+
+    await callback.answer("🔕 Напоминания о продлении отключены")
+    # кнопку продления оставляем, убираем только эту
+    rows = [
+        row
+        for row in callback.message.reply_markup.inline_keyboard
+        if not any(button.callback_data == callback.data for button in row)
+    ]
+    await callback.message.edit_reply_markup(
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=rows)
+    )
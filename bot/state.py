@@ -0,0 +1,110 @@
+import time
+from collections import OrderedDict
+
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import settings
+
+
+class MemoryPendingStore:
+    """
+    Per-process store: fine for a single bot instance. Entries expire after
+    `ttl` seconds and the oldest ones are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def get(self, key: str) -> str | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry[1]
+
+    async def add(self, key: str, value: str, ttl: float | None = None) -> bool:
+        """Set only if the key is absent; False when it already exists."""
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisPendingStore:
+    """
+    Shared store: every bot replica sees the same entries, so an update may
+    land on any instance. Redis expires the keys itself.
+    """
+
+    def __init__(self, redis, ttl: float, prefix: str = "bot:"):
+        self.redis = redis
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    async def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        await self.redis.set(self.prefix + key, value, ex=int(ttl or self.ttl))
+
+    async def get(self, key: str) -> str | None:
+        value = await self.redis.get(self.prefix + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def add(self, key: str, value: str, ttl: float | None = None) -> bool:
+        # SET NX: atomic across replicas
+        created = await self.redis.set(
+            self.prefix + key, value, ex=int(ttl or self.ttl), nx=True
+        )
+        return bool(created)
+
+    async def delete(self, key: str) -> None:
+        await self.redis.delete(self.prefix + key)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_stores():
+    """
+    (pending store, aiogram FSM storage) on the backend chosen by
+    STATE_BACKEND, so both kinds of per-user state live in the same place.
+    """
+    ttl = settings.PENDING_STATE_TTL
+
+    if settings.STATE_BACKEND == "redis":
+        # optional dependency: only needed when running several replicas
+        from aiogram.fsm.storage.redis import RedisStorage
+        from redis.asyncio import Redis
+
+        redis = Redis.from_url(settings.REDIS_URL)
+        return (
+            RedisPendingStore(redis, ttl),
+            RedisStorage(redis, state_ttl=int(ttl), data_ttl=int(ttl)),
+        )
+
+    if settings.STATE_BACKEND != "memory":
+        raise ValueError(f"Unknown STATE_BACKEND: {settings.STATE_BACKEND!r}")
+
+    return MemoryPendingStore(ttl, settings.PENDING_STATE_MAX_ENTRIES), MemoryStorage()
+
+
+pending_store, fsm_storage = create_stores()
+
+
+async def close_stores() -> None:
+    await fsm_storage.close()
+    await pending_store.close()
@@ -0,0 +1,81 @@
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import TelegramObject, Update
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config import settings
+from state import pending_store
+
+
+class DedupeUpdatesMiddleware(BaseMiddleware):
+    """
+    Drops updates that were already taken by this or another replica.
+
+    Telegram redelivers an update when the webhook answer is slow or fails,
+    and behind a load balancer the retry may hit a different instance, so
+    the seen update_ids are kept in the shared state store.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update):
+            first = await pending_store.add(
+                f"update:{event.update_id}", "1", ttl=settings.WEBHOOK_DEDUPE_TTL
+            )
+            if not first:
+                print(f"[WEBHOOK] ⚠ duplicate update {event.update_id} skipped")
+                return None
+        return await handler(event, data)
+
+
+async def _health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok"})
+
+
+def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """
+    Serve updates over HTTPS webhook instead of long polling.
+
+    Every replica runs the same app; any of them can take any update, so
+    the state must live in the shared store (STATE_BACKEND=redis).
+    """
+    if not settings.WEBHOOK_BASE_URL:
+        raise ValueError("WEBHOOK_BASE_URL is required for BOT_MODE=webhook")
+    if not settings.WEBHOOK_SECRET:
+        # without it anyone who finds the URL can post fake updates
+        raise ValueError("WEBHOOK_SECRET is required for BOT_MODE=webhook")
+    if settings.STATE_BACKEND != "redis":
+        # update_id dedupe and FSM state must be shared between replicas
+        raise ValueError("BOT_MODE=webhook requires STATE_BACKEND=redis")
+
+    dp.update.outer_middleware(DedupeUpdatesMiddleware())
+
+    async def on_startup(bot: Bot) -> None:
+        # setWebhook is idempotent, so every replica may call it
+        await bot.set_webhook(
+            settings.WEBHOOK_BASE_URL.rstrip("/") + settings.WEBHOOK_PATH,
+            secret_token=settings.WEBHOOK_SECRET,
+            max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+
+    dp.startup.register(on_startup)
+
+    app = web.Application()
+    app.router.add_get("/health", _health)
+    # answers 200 right away and handles the update in the background;
+    # requests without the right X-Telegram-Bot-Api-Secret-Token get 401
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.WEBHOOK_SECRET,
+    ).register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    web.run_app(app, host=settings.WEBAPP_HOST, port=settings.WEBAPP_PORT)